@@ -0,0 +1,113 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Micro-benchmark of the member cache against the old list backed circular queue
+
+Run from the root of the project:
+    python -m benchmarks.cache_benchmark [--ops 10000]
+"""
+
+import argparse
+import threading
+import time
+
+from bot.libs.cache import MyCoolCache
+
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+class LegacyQueue:
+    """The list backed queue that MyCoolCache used to evict with (kept for comparison)"""
+
+    threadLock = threading.Lock()
+
+    def __init__(self, size):
+        self.values = []
+        self.MAX_SIZE = size
+
+    def push(self, value):
+        with self.threadLock:
+            self.values.append(value)
+            if len(self.values) > self.MAX_SIZE:
+                return self.values.pop(0)
+            return None
+
+
+class LegacyCache:
+    """The old MyCoolCache, evicting with list.pop(0) and leaving None tombstones behind"""
+
+    threadLock = threading.Lock()
+
+    def __init__(self, size):
+        self.MAX_SIZE = size
+        self.queue = LegacyQueue(size)
+        self.cache = {}
+
+    def get_cache(self, key):
+        return self.cache.get(key)
+
+    def store_cache(self, key, dict_item):
+        with self.threadLock:
+            if self.cache.get(key) is None:
+                key_to_delete = self.queue.push(key)
+                if key_to_delete is not None:
+                    self.cache[key_to_delete] = None
+            self.cache[key] = dict_item
+
+
+def fill(cache, size):
+    """Fill the cache up to its maximum size"""
+
+    for member_id in range(size):
+        cache.store_cache((member_id, 1), {"married": None})
+
+
+def time_ops(func, ops):
+    """Return the mean time of a single operation in microseconds"""
+
+    start = time.perf_counter()
+    for i in range(ops):
+        func(i)
+    return (time.perf_counter() - start) / ops * 1_000_000
+
+
+def run(cache_cls, size, ops):
+    cache = cache_cls(size)
+    fill(cache, size)
+
+    # Every store is a miss that has to evict the oldest record
+    miss = time_ops(lambda i: cache.store_cache((size + i, 1), {"married": None}), ops)
+    # Lookups of keys that are still cached
+    hit = time_ops(lambda i: cache.get_cache((size + i, 1)), ops)
+
+    return miss, hit, len(cache.cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=10_000, help="Operations timed per size")
+    args = parser.parse_args()
+
+    print(f"{'entries':>10} | {'cache':>12} | {'miss+evict µs':>14} | {'hit µs':>8} | {'dict keys':>10}")
+    for size in SIZES:
+        for name, cache_cls in (("legacy", LegacyCache), ("lru", MyCoolCache)):
+            miss, hit, keys = run(cache_cls, size, args.ops)
+            print(f"{size:>10,} | {name:>12} | {miss:>14.3f} | {hit:>8.3f} | {keys:>10,}")
+
+
+if __name__ == "__main__":
+    main()
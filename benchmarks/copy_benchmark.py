@@ -0,0 +1,97 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Peak memory of copying the members of a huge guild into the members table,
+with every record built into a list up front and a chunk of member ids at a time (Bot.copy_members)
+
+COPY is stood in for by a connection that goes through the records the way asyncpg does and throws them away
+Run from the root of the project:
+    python -m benchmarks.copy_benchmark [--members 500000] [--chunk-size 10000]
+"""
+
+import argparse
+import asyncio
+import itertools
+import struct
+import time
+import tracemalloc
+
+GUILD_ID = 663651584399507476
+SNOWFLAKE = 716701699145728094
+
+
+class SinkConnection:
+    """Encodes every record it's given like a binary COPY would, without keeping them"""
+
+    def __init__(self):
+        self.rows = 0
+
+    async def copy_records_to_table(self, table_name, *, records):
+        for record in records:
+            struct.pack("<qq", record[0], record[3])
+            self.rows += 1
+        await asyncio.sleep(0)
+
+
+async def copy_list(conn, member_ids, chunk_size):
+    """The old on_guild_join, building a record for every member before copying them all at once"""
+
+    records = [(member_id, None, None, GUILD_ID, None, None, None, 0) for member_id in member_ids]
+    await conn.copy_records_to_table("members", records=records)
+
+
+async def copy_chunks(conn, member_ids, chunk_size):
+    """Bot.copy_members, generating the records of one chunk of member ids at a time"""
+
+    member_ids = iter(member_ids)
+    while chunk := list(itertools.islice(member_ids, chunk_size)):
+        records = ((member_id, None, None, GUILD_ID, None, None, None, 0) for member_id in chunk)
+        await conn.copy_records_to_table("members", records=records)
+
+
+def measure(copy, members, chunk_size):
+    """Return the peak memory (in MB) and seconds taken to copy the members"""
+
+    conn = SinkConnection()
+    # The member ids are generated as they're used, as the members are already held by discord.py either way
+    member_ids = (SNOWFLAKE + i for i in range(members))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    asyncio.run(copy(conn, member_ids, chunk_size))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert conn.rows == members
+    return peak / 1024 / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=500_000, help="Members in the guild")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="Member ids copied at a time")
+    args = parser.parse_args()
+
+    print(f"{'copy':>6} | {'peak MB':>8} | {'seconds':>8}")
+    for name, copy in (("list", copy_list), ("chunks", copy_chunks)):
+        peak, elapsed = measure(copy, args.members, args.chunk_size)
+        print(f"{name:>6} | {peak:>8.1f} | {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
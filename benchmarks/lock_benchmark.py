@@ -0,0 +1,69 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Per-call overhead of the lock on the Bot.check_cache hit path
+
+The locked run wraps the cache in ThreadSafeCache, which takes a lock on
+every call just like MyCoolCache used to.
+
+Run from the root of the project:
+    python -m benchmarks.lock_benchmark [--calls 1000000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from bot.libs.cache import MyCoolCache, ThreadSafeCache
+
+MEMBERS = 10_000
+
+
+async def check_cache(member_cache, member_id, guild_id):
+    """The cache hit path of Bot.check_cache"""
+
+    if (result := member_cache.get_cache((member_id, guild_id))) is not None:
+        return result
+
+
+async def run(member_cache, calls):
+    for member_id in range(MEMBERS):
+        member_cache.store_cache((member_id, 1), {"married": None})
+
+    start = time.perf_counter()
+    for i in range(calls):
+        await check_cache(member_cache, i % MEMBERS, 1)
+    return (time.perf_counter() - start) / calls * 1_000_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1_000_000, help="Cache hits timed per run")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    locked = loop.run_until_complete(run(ThreadSafeCache(MyCoolCache(MEMBERS)), args.calls))
+    lock_free = loop.run_until_complete(run(MyCoolCache(MEMBERS), args.calls))
+    loop.close()
+
+    print(f"locked:    {locked:.1f} ns per check_cache hit")
+    print(f"lock-free: {lock_free:.1f} ns per check_cache hit")
+    print(f"removed:   {locked - lock_free:.1f} ns per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Messages per second through process_commands with the old and the cached prefix resolver,
+and with messages that don't start with a prefix dropped before process_commands (fast path)
+
+Run from the root of the project:
+    python -m benchmarks.prefix_benchmark [--messages 100000] [--guilds 1000]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+from discord.ext import commands
+from discord.ext.commands import when_mentioned_or
+
+BOT_ID = 716701699145728094
+GUILD_ID = 663651584399507476
+
+
+class Resolver:
+    """The guild prefixes, as stored in enso_cache, along with both ways of turning them into prefix lists"""
+
+    def __init__(self, guilds):
+        self.enso_cache = {GUILD_ID + i: SimpleNamespace(prefix=random.choice((".", "!", "~", None)))
+                           for i in range(guilds)}
+        self.prefix_cache = {}
+
+    def get_prefix_for_guild(self, guild_id):
+        prefix = self.enso_cache[guild_id].prefix
+        if prefix:
+            return prefix
+        return "."
+
+    async def legacy(self, bot, message):
+        """The old get_prefix, building the prefix list with when_mentioned_or for every message"""
+
+        if message.guild is None:
+            return "."
+        return when_mentioned_or(self.get_prefix_for_guild(message.guild.id))(bot, message)
+
+    def cached(self, bot, message):
+        """The new get_prefix, with the prefixes of every guild built once"""
+
+        if message.guild is None:
+            return "."
+
+        if (prefixes := self.prefix_cache.get(message.guild.id)) is None:
+            prefixes = (f"<@{bot.user.id}> ", f"<@!{bot.user.id}> ", self.get_prefix_for_guild(message.guild.id))
+            self.prefix_cache[message.guild.id] = prefixes
+
+        return prefixes
+
+
+def make_bot(command_prefix):
+    """Bot with a single command that does nothing, logged in as Ensō~Chan without connecting"""
+
+    bot = commands.Bot(command_prefix=command_prefix)
+    bot._connection.user = SimpleNamespace(id=BOT_ID, mention=f"<@{BOT_ID}>")
+
+    @bot.command(name="ping")
+    async def ping(ctx):
+        pass
+
+    return bot
+
+
+def make_messages(resolver, amount, guilds):
+    """Mostly chatter, with every tenth message a command using the prefix of its guild"""
+
+    messages = []
+    for i in range(amount):
+        guild_id = GUILD_ID + random.randrange(guilds)
+        content = f"{resolver.get_prefix_for_guild(guild_id)}ping" if i % 10 == 0 else f"just talking about anime {i}"
+        messages.append(SimpleNamespace(content=content,
+                                        author=SimpleNamespace(id=i, bot=False),
+                                        guild=SimpleNamespace(id=guild_id),
+                                        channel=None,
+                                        _state=None))
+    return messages
+
+
+async def run(bot, messages, fast_path=None):
+    """Return the messages per second that the bot goes through"""
+
+    start = time.perf_counter()
+    for message in messages:
+        if fast_path and not message.content.startswith(fast_path(bot, message)):
+            continue
+        await bot.process_commands(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000, help="Messages sent through each bot")
+    parser.add_argument("--guilds", type=int, default=1_000, help="Guilds the messages are spread across")
+    args = parser.parse_args()
+
+    random.seed(0)
+    resolver = Resolver(args.guilds)
+    messages = make_messages(resolver, args.messages, args.guilds)
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    print(f"{'resolver':>9} | {'messages/s':>11}")
+    for name, command_prefix, fast_path in (("legacy", resolver.legacy, None),
+                                            ("cached", resolver.cached, None),
+                                            ("fast path", resolver.cached, resolver.cached)):
+        rate = loop.run_until_complete(run(make_bot(command_prefix), messages, fast_path))
+        print(f"{name:>9} | {rate:>11,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Bytes used per cache entry by the old dicts and the __slots__ records
+
+Run from the root of the project:
+    python -m benchmarks.records_benchmark [--entries 100000]
+"""
+
+import argparse
+import tracemalloc
+
+from bot.libs.records import GuildConfig, ModmailConfig, StarboardConfig, StarMessage, MemberRecord
+
+SNOWFLAKE = 716701699145728094
+
+# Name, the old dict built for each entry, the record built for each entry
+ENTRIES = (
+    ("GuildConfig",
+     lambda i: {"prefix": ".", "modlogs": SNOWFLAKE + i, "roles_persist": 0},
+     lambda i: GuildConfig(".", SNOWFLAKE + i, 0)),
+    ("ModmailConfig",
+     lambda i: {"modmail_channel_id": SNOWFLAKE + i, "message_id": SNOWFLAKE + i,
+                "modmail_logging_channel_id": SNOWFLAKE + i},
+     lambda i: ModmailConfig(SNOWFLAKE + i, SNOWFLAKE + i, SNOWFLAKE + i)),
+    ("StarboardConfig",
+     lambda i: {"channel_id": SNOWFLAKE + i, "min_stars": 1},
+     lambda i: StarboardConfig(SNOWFLAKE + i, 1)),
+    ("StarMessage",
+     lambda i: {"star_message_id": SNOWFLAKE + i, "stars": 1},
+     lambda i: StarMessage(SNOWFLAKE + i, 1)),
+    ("MemberRecord",
+     lambda i: {"married": None, "married_date": None, "muted_roles": None, "roles": None},
+     lambda i: MemberRecord(None, None, None, None)),
+)
+
+
+def bytes_per_entry(build, entries):
+    """Average amount of memory allocated for each entry"""
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    values = [build(i) for i in range(entries)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # The list holding the entries is part of the measurement, take it back off
+    return (after - before - values.__sizeof__()) / entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100_000, help="Entries built per type")
+    args = parser.parse_args()
+
+    print(f"{'record':>16} | {'dict B':>8} | {'record B':>8} | {'saved':>6}")
+    for name, build_dict, build_record in ENTRIES:
+        old = bytes_per_entry(build_dict, args.entries)
+        new = bytes_per_entry(build_record, args.entries)
+        print(f"{name:>16} | {old:>8.1f} | {new:>8.1f} | {(1 - new / old) * 100:>5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
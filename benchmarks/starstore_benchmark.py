@@ -0,0 +1,85 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Memory, lookup and guild removal of the columnar starboard message store against the LRU cache
+
+Run from the root of the project:
+    python -m benchmarks.starstore_benchmark [--rows 1000000] [--guilds 1000]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from bot.libs.cache import MyCoolCache
+from bot.libs.records import StarMessage
+from bot.libs.starstore import StarMessageStore
+
+SNOWFLAKE = 716701699145728094
+
+
+def build(cache_cls, keys):
+    """Fill a cache with every key, returning it with the bytes it allocated per message"""
+
+    tracemalloc.start()
+    cache = cache_cls(len(keys))
+    for i, key in enumerate(keys):
+        cache.store_cache(key, StarMessage(SNOWFLAKE + i if i % 10 == 0 else None, i % 20))
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cache, used / len(keys)
+
+
+def time_ops(func, args):
+    """Return the mean time of a single call in microseconds"""
+
+    start = time.perf_counter()
+    for arg in args:
+        func(arg)
+    return (time.perf_counter() - start) / len(args) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Starboard messages stored")
+    parser.add_argument("--guilds", type=int, default=1_000, help="Guilds the messages are spread across")
+    parser.add_argument("--ops", type=int, default=100_000, help="Lookups timed")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    # Stored oldest first, the same way they are loaded on startup
+    keys = sorted((SNOWFLAKE + rng.getrandbits(40), rng.randrange(args.guilds) + 1) for _ in range(args.rows))
+    lookups = [rng.choice(keys) for _ in range(args.ops)]
+
+    print(f"{'store':>9} | {'bytes/msg':>9} | {'build s':>8} | {'lookup µs':>9} | {'remove guild ms':>15}")
+    for name, cache_cls in (("lru", MyCoolCache), ("columnar", StarMessageStore)):
+        start = time.perf_counter()
+        cache, per_message = build(cache_cls, keys)
+        # tracemalloc slows everything down, so the build time is only a rough comparison
+        built = time.perf_counter() - start
+
+        lookup = time_ops(cache.get_cache, lookups)
+        remove = time_ops(cache.remove_many, range(1, 11)) / 1000
+
+        print(f"{name:>9} | {per_message:>9.1f} | {built:>8.1f} | {lookup:>9.3f} | {remove:>15.3f}")
+        del cache
+
+
+if __name__ == "__main__":
+    main()
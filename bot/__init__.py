@@ -13,18 +13,29 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
+import datetime
+import itertools
 import os
-import pathlib
 import random
+import time
 
 import asyncpg as asyncpg
 import discord
 from decouple import config
 from discord import Colour, Embed
 from discord.ext import commands, tasks
-from discord.ext.commands import when_mentioned_or
-
-from bot.libs.cache import MyCoolCache
+from psutil import Process
+
+from bot.libs.cache import MyCoolCache, CacheStats, SingleFlight, NegativeCache
+from bot.libs.cluster import ClusterClient
+from bot.libs.ingest import MemberIngestQueue
+from bot.libs.invalidation import CacheInvalidator
+from bot.libs.linecount import line_count
+from bot.libs import queries
+from bot.libs.pool import InstrumentedPool
+from bot.libs.records import GuildConfig, ModmailConfig, StarboardConfig, StarMessage, MemberRecord
+from bot.libs.starstore import StarMessageStore
 
 # Counter for cycling statuses
 counter = 0
@@ -36,25 +47,87 @@ user = config('DB_USER')
 port = config('DB_PORT')
 db = config('DB_NAME')
 
+# Size of the connection pool, more connections let more queries run at the same time
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=10, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+# Seconds a query can take and seconds to wait for a free connection before giving up (0 waits forever)
+DB_COMMAND_TIMEOUT = config('DB_COMMAND_TIMEOUT', default=0, cast=float)
+DB_ACQUIRE_TIMEOUT = config('DB_ACQUIRE_TIMEOUT', default=0, cast=float)
+# Prepared statements cached per connection (0 disables it, needed behind pgbouncer in transaction mode)
+# And seconds an idle connection is kept open
+DB_STATEMENT_CACHE_SIZE = config('DB_STATEMENT_CACHE_SIZE', default=100, cast=int)
+DB_MAX_INACTIVE_LIFETIME = config('DB_MAX_INACTIVE_LIFETIME', default=300, cast=float)
+# Latest acquire/query latencies kept for the dbstats command
+DB_LATENCY_SAMPLES = config('DB_LATENCY_SAMPLES', default=1000, cast=int)
+
 # Getting the bot token from environment variables
 API_TOKEN = config('DISCORD_TOKEN')
 
-
-class Bot(commands.Bot):
-    def __init__(self, **options):
-
-        async def get_prefix(bot, message):
+# How long (in seconds) rows that don't exist in the database are remembered as missing
+NEGATIVE_CACHE_TTL = config('NEGATIVE_CACHE_TTL', default=60, cast=int)
+NEGATIVE_CACHE_SIZE = config('NEGATIVE_CACHE_SIZE', default=10000, cast=int)
+
+# Buffer starboard star counts in memory and write them in batches every STARBOARD_FLUSH_INTERVAL seconds
+# Counts not yet flushed are lost if the process crashes, disable to write every star straight away
+STARBOARD_WRITE_BEHIND = config('STARBOARD_WRITE_BEHIND', default=True, cast=bool)
+STARBOARD_FLUSH_INTERVAL = config('STARBOARD_FLUSH_INTERVAL', default=5, cast=float)
+
+# Members of a guild are copied into the database MEMBER_COPY_CHUNK_SIZE at a time, so memory stays the same
+# However big the guild is
+MEMBER_COPY_CHUNK_SIZE = config('MEMBER_COPY_CHUNK_SIZE', default=10000, cast=int)
+
+# Members joining and leaving are collected for MEMBER_INGEST_DELAY seconds and written together in one batch
+# Or straight away once MEMBER_INGEST_BATCH_SIZE of them are waiting
+MEMBER_INGEST_DELAY = config('MEMBER_INGEST_DELAY', default=0.02, cast=float)
+MEMBER_INGEST_BATCH_SIZE = config('MEMBER_INGEST_BATCH_SIZE', default=1000, cast=int)
+
+# Maximum amount of starboard messages kept in cache, the least recently used are loaded again from the database
+STARBOARD_MESSAGES_CACHE_SIZE = config('STARBOARD_MESSAGES_CACHE_SIZE', default=50000, cast=int)
+# "columnar" keeps starboard messages in compact sorted arrays instead of an LRU cache, using a fraction of the memory
+# When millions of them are kept. Once it's full, the oldest messages are dropped rather than the least recently used
+STARBOARD_MESSAGES_STORE = config('STARBOARD_MESSAGES_STORE', default='lru')
+# Starboard messages from the last STARBOARD_PRELOAD_DAYS days are loaded on startup
+# 0 loads nothing and a negative value loads as many as the cache can hold
+STARBOARD_PRELOAD_DAYS = config('STARBOARD_PRELOAD_DAYS', default=7, cast=int)
+# Amount of starboard messages fetched from the database at a time on startup
+STARBOARD_PRELOAD_PAGE_SIZE = config('STARBOARD_PRELOAD_PAGE_SIZE', default=1000, cast=int)
+# Let the bot come online before the starboard messages have finished loading
+STARTUP_DEFER_STARBOARD_MESSAGES = config('STARTUP_DEFER_STARBOARD_MESSAGES', default=False, cast=bool)
+
+# Maximum amount of starred messages kept in cache, so they don't have to be fetched for every star
+ROOT_MESSAGE_CACHE_SIZE = config('ROOT_MESSAGE_CACHE_SIZE', default=5000, cast=int)
+
+# Send/receive cache invalidations through Postgres LISTEN/NOTIFY, needed when more than one process uses the database
+CACHE_NOTIFY = config('CACHE_NOTIFY', default=False, cast=bool)
+CACHE_NOTIFY_CHANNEL = config('CACHE_NOTIFY_CHANNEL', default='enso_cache')
+# How often (in seconds) the listening connection is checked, and reconnected if it has been lost
+CACHE_NOTIFY_CHECK_INTERVAL = config('CACHE_NOTIFY_CHECK_INTERVAL', default=30, cast=float)
+
+# Tables that are cached in full for every guild, reloaded when another process changes them
+GUILD_TABLES = ("guilds", "moderatormail", "starboard")
+
+# How often (in seconds) a process run by launcher.py reports its stats and gets the stats of the other clusters
+CLUSTER_STATS_INTERVAL = config('CLUSTER_STATS_INTERVAL', default=10, cast=float)
+
+
+class Bot(commands.AutoShardedBot):
+    def __init__(self, cluster_id=None, cluster_socket=None, **options):
+
+        def get_prefix(bot, message):
             """Allow the commands to be used with mentioning the bot"""
 
             if message.guild is None:
                 return "."
-            return when_mentioned_or(self.get_prefix_for_guild(message.guild.id))(bot, message)
+            return self.get_prefixes_for_guild(message.guild.id)
 
         intents = discord.Intents.default()
         intents.members = True
         super().__init__(intents=intents, command_prefix=get_prefix, case_insensitive=True, **options)
         self.db = None
         self.line_count = None
+        # Messages passed on to process_commands and messages dropped before it for not starting with a prefix
+        self.messages_processed = 0
+        self.messages_skipped = 0
         self.description = 'All current available commands within Ensō~Chan',
         self.owner_id = 154840866496839680  # Your unique User ID
         self.admin_colour = Colour(0x62167a)  # Admin Embed Colour
@@ -81,122 +154,164 @@ class Bot(commands.Bot):
 
         # Instance variables for cache
         self.enso_cache = {}
+        self.prefix_cache = {}
         self.modmail_cache = {}
         self.starboard_cache = {}
-        self.starboard_messages_cache = {}
+        if STARBOARD_MESSAGES_STORE == "columnar":
+            self.starboard_messages_cache = StarMessageStore(STARBOARD_MESSAGES_CACHE_SIZE)
+        else:
+            self.starboard_messages_cache = MyCoolCache(STARBOARD_MESSAGES_CACHE_SIZE)
+        self.starboard_messages_negative_cache = NegativeCache(NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_SIZE)
+        self.starboard_dirty_stars = {}
+        self.root_message_cache = MyCoolCache(ROOT_MESSAGE_CACHE_SIZE)
+        self.root_message_stats = CacheStats()
         self.member_cache = MyCoolCache(100)
+        self.member_negative_cache = NegativeCache(NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_SIZE)
+        self.member_cache_stats = CacheStats()
+        self.member_fetches = SingleFlight()
+        self.cache_invalidator = CacheInvalidator(CACHE_NOTIFY_CHANNEL, self.on_cache_notification)
+        self.member_queue = MemberIngestQueue(self.notify_cache, MEMBER_INGEST_DELAY, MEMBER_INGEST_BATCH_SIZE)
+
+        # Connection to launcher.py when running as one of its clusters
+        self.cluster = ClusterClient(cluster_id, cluster_socket) if cluster_socket else None
 
         async def create_connection():
             """Setting up connection using asyncpg"""
 
-            self.db = await asyncpg.create_pool(
+            pool = await asyncpg.create_pool(
                 host=host,
                 port=int(port),
                 user=user,
                 password=password,
                 database=db,
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                command_timeout=DB_COMMAND_TIMEOUT or None,
+                statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+                max_inactive_connection_lifetime=DB_MAX_INACTIVE_LIFETIME,
                 loop=self.loop)
 
-        async def line_count():
-            """Getting the line count of the project"""
-
-            code = 0
-            comments = 0
-            blank = 0
-            file_amount = 0
-            ENV = "venv"
-
-            for path, _, files in os.walk("."):
-                if ".local" in path:
-                    continue
-                for name in files:
-                    file_dir = str(pathlib.PurePath(path, name))
-                    # Ignoring the venv directory
-                    if not name.endswith(".py") or ENV in file_dir:
+            # Record how long connections are waited for and how long every query takes
+            self.db = InstrumentedPool(pool, DB_POOL_MAX_SIZE, acquire_timeout=DB_ACQUIRE_TIMEOUT or None,
+                                      samples=DB_LATENCY_SAMPLES)
+            self.member_queue.pool = self.db
+
+        async def listen_for_invalidations():
+            """Listen for cache invalidations from other processes on a connection of its own"""
+
+            # Listening connections can't be returned to a pool, so it's kept outside of it
+            try:
+                conn = await asyncpg.connect(host=host, port=int(port), user=user, password=password, database=db,
+                                             loop=self.loop)
+                await self.cache_invalidator.listen(conn)
+
+            # Catch errors
+            except (OSError, asyncpg.PostgresError) as e:
+                print("PostGres Error: Could Not Listen For Cache Invalidations", e)
+                return False
+
+            else:
+                print(f"Listening For Cache Invalidations On {CACHE_NOTIFY_CHANNEL}")
+                return True
+
+        async def load_guilds(conn):
+            """Query to get all records of guilds that the bot is in"""
+
+            results = await conn.fetch(queries.LOAD_GUILDS, *self.handled_shards())
+
+            # Store the guilds information within cache
+            # The cache is built again from scratch, so guilds that have been deleted since aren't kept
+            self.enso_cache = {row["guild_id"]: GuildConfig(row["prefix"], row["modlogs"], row["roles_persist"])
+                               for row in results}
+            # Prefixes may have changed when the guilds are loaded again
+            self.prefix_cache.clear()
+
+        async def load_modmail(conn):
+            """Query to get all records of modmails within guilds"""
+
+            results = await conn.fetch(queries.LOAD_MODMAIL, *self.handled_shards())
+
+            # Store the information for modmail within cache, built again from scratch
+            self.modmail_cache = {row["guild_id"]: ModmailConfig(row["modmail_channel_id"], row["message_id"],
+                                                                 row["modmail_logging_channel_id"])
+                                  for row in results}
+
+        async def load_starboards(conn):
+            """Query to get all records of starboards within guilds"""
+
+            results = await conn.fetch(queries.LOAD_STARBOARDS, *self.handled_shards())
+
+            # Store the information for starboard within cache, built again from scratch
+            self.starboard_cache = {row["guild_id"]: StarboardConfig(row["channel_id"], row["min_stars"])
+                                    for row in results}
+
+        async def load_starboard_messages(conn):
+            """Page the most recent starboard messages into cache, oldest first so the newest are used last"""
+
+            # Message ids are snowflakes, so they can be compared against the time they were sent
+            if STARBOARD_PRELOAD_DAYS > 0:
+                since = datetime.datetime.utcnow() - datetime.timedelta(days=STARBOARD_PRELOAD_DAYS)
+                min_message_id = discord.utils.time_snowflake(since)
+            else:
+                min_message_id = 0
+
+            # Cursors have to be used within a transaction
+            async with conn.transaction():
+                async for row in conn.cursor(queries.LOAD_STARBOARD_MESSAGES, *self.handled_shards(), min_message_id,
+                                             STARBOARD_MESSAGES_CACHE_SIZE, prefetch=STARBOARD_PRELOAD_PAGE_SIZE):
+                    key = (row["root_message_id"], row["guild_id"])
+
+                    # When loading in the background, messages may already have been loaded (and starred) on demand
+                    if key in self.starboard_messages_cache:
                         continue
-                    file_amount += 1
-                    with open(file_dir, "r", encoding="utf-8") as file:
-                        for line in file:
-                            if line.strip().startswith("#"):
-                                comments += 1
-                            elif not line.strip():
-                                blank += 1
-                            else:
-                                code += 1
-
-            # Adding up the total lines of code
-            total = comments + blank + code
-
-            self.line_count = f"Code: {code}\n" \
-                              f"Commentary: {comments}\n" \
-                              f"Blank: {blank}\n" \
-                              f"Total: {total}\n" \
-                              f"Files: {file_amount}"
 
-        async def startup_cache_log():
-            """Store the guilds/modmail systems in cache from the database on startup"""
+                    stars = self.starboard_dirty_stars.get(key, row["stars"])
+                    self.cache_store_starboard_message(*key, row["star_message_id"], stars)
+
+        async def load_table(name, loader):
+            """Load a table into cache on its own pool connection and log how long it took"""
+
+            start = time.perf_counter()
 
             # Setup up pool connection
             pool = self.db
             async with pool.acquire() as conn:
-
-                # Query to get all records of guilds that the bot is in
                 try:
-                    results = await conn.fetch("""SELECT * FROM guilds""")
+                    await loader(conn)
 
-                    # Store the guilds information within cache
-                    for row in results:
-                        self.enso_cache[row["guild_id"]] = {"prefix": row["prefix"],
-                                                            "modlogs": row["modlogs"],
-                                                            "roles_persist": row["roles_persist"]}
                 # Catch errors
                 except asyncpg.PostgresError as e:
-                    print("PostGres Error: Guild Records Could Not Be Loaded Into Cache On Startup", e)
+                    print(f"PostGres Error: {name} Records Could Not Be Loaded Into Cache On Startup", e)
 
-                # Query to get all records of modmails within guilds
-                try:
-                    results = await conn.fetch("""SELECT * FROM moderatormail""")
-
-                    # Store the information for modmail within cache
-                    for row in results:
-                        self.modmail_cache[row["guild_id"]] = {"modmail_channel_id": row["modmail_channel_id"],
-                                                               "message_id": row["message_id"],
-                                                               "modmail_logging_channel_id":
-                                                                   row["modmail_logging_channel_id"]}
-                # Catch errors
-                except asyncpg.PostgresError as e:
-                    print("PostGres Error: Modmail Records Could Not Be Loaded Into Cache On Startup", e)
-
-                # Query to get all records of starboards within guilds
-                try:
-                    results = await conn.fetch("SELECT * FROM starboard")
-
-                    # Store the information for starboard within cache
-                    for row in results:
-                        self.starboard_cache[row["guild_id"]] = {"channel_id": row["channel_id"],
-                                                                 "min_stars": row["min_stars"]}
+                # Print how long the table took to load
+                else:
+                    print(f"{name} Records Loaded Into Cache In {time.perf_counter() - start:.2f}s")
 
-                # Catch errors
-                except asyncpg.PostgresError as e:
-                    print("PostGres Error: Starboard Records Could Not Be Loaded Into Cache On Startup", e)
+        async def startup_cache_log():
+            """Store the guilds/modmail systems in cache from the database on startup"""
 
-                # Query to get all records of starboard messages within guilds
-                try:
-                    results = await conn.fetch("SELECT * FROM starboard_messages")
+            # Every table is loaded at the same time on separate connections
+            tables = [load_table("Guild", load_guilds),
+                      load_table("Modmail", load_modmail),
+                      load_table("Starboard", load_starboards)]
 
-                    for row in results:
-                        self.starboard_messages_cache[(row["root_message_id"], row["guild_id"])] = {
-                            "star_message_id": row["star_message_id"],
-                            "stars": row["stars"]}
+            # Load the most recent starboard messages within guilds, the rest are loaded on demand
+            # They aren't needed for the bot to work, so they can be loaded once the bot is online
+            if STARBOARD_PRELOAD_DAYS:
+                if STARTUP_DEFER_STARBOARD_MESSAGES:
+                    self.loop.create_task(load_table("Starboard Message", load_starboard_messages))
+                else:
+                    tables.append(load_table("Starboard Message", load_starboard_messages))
 
-                # Catch errors
-                except asyncpg.PostgresError as e:
-                    print("PostGres Error: Starboard Records Could Not Be Loaded Into Cache On Startup", e)
+            start = time.perf_counter()
+            await asyncio.gather(*tables)
+            print(f"Startup Cache Loaded In {time.perf_counter() - start:.2f}s")
 
         # Establish Database Connection
         self.loop.run_until_complete(create_connection())
-        # Get line count of project
-        self.loop.run_until_complete(line_count())
+        # Start listening before loading, so no changes are missed in between
+        if CACHE_NOTIFY:
+            self.loop.run_until_complete(listen_for_invalidations())
         # Load Information Into Cache
         self.loop.run_until_complete(startup_cache_log())
 
@@ -233,86 +348,464 @@ class Bot(commands.Bot):
             # Display the next status in the loop
             await self.change_presence(activity=looping_statuses[counter])
 
+        @tasks.loop(seconds=STARBOARD_FLUSH_INTERVAL, reconnect=True)
+        async def flush_starboard_stars():
+            """Writing the buffered starboard star counts to the database as a background task"""
+
+            await self.flush_starboard_stars()
+
+        @tasks.loop(seconds=CACHE_NOTIFY_CHECK_INTERVAL, reconnect=True)
+        async def check_cache_listener():
+            """Reconnect the invalidation listener when its connection has been lost as a background task"""
+
+            if self.cache_invalidator.is_listening() or not await listen_for_invalidations():
+                return
+
+            # Anything could have changed while nothing was being received, so reload the caches
+            # Members are loaded again on demand, including the ones that have been given records since
+            self.member_cache.clear()
+            self.member_negative_cache.clear()
+            await asyncio.gather(load_table("Guild", load_guilds),
+                                 load_table("Modmail", load_modmail),
+                                 load_table("Starboard", load_starboards))
+
+        @tasks.loop(seconds=CLUSTER_STATS_INTERVAL, reconnect=True)
+        async def report_cluster_stats():
+            """Exchanging stats with the other clusters through the launcher as a background task"""
+
+            try:
+                await self.cluster.exchange(self.cluster_stats())
+
+            # Catch errors
+            except (OSError, ValueError) as e:
+                print(f"Cluster {self.cluster.cluster_id} Could Not Exchange Stats With The Launcher", e)
+
         # Start the background task(s)
         change_status.start()
+        if self.cluster:
+            report_cluster_stats.start()
+        if STARBOARD_WRITE_BEHIND:
+            flush_starboard_stars.start()
+        if CACHE_NOTIFY:
+            check_cache_listener.start()
+
+    def handled_shards(self):
+        """Return the shard count and the ids of the shards handled by this process, for queries.SHARD_FILTER"""
+
+        # Without explicit shards (or before Discord has said how many there are), every guild is handled here
+        if self.shard_count is None or self.shard_ids is None:
+            return 1, [0]
+
+        return self.shard_count, list(self.shard_ids)
+
+    def handles_guild(self, guild_id):
+        """Return whether the guild is on one of the shards handled by this process"""
+
+        shard_count, shard_ids = self.handled_shards()
+        return (guild_id >> 22) % shard_count in shard_ids
+
+    def cluster_stats(self):
+        """Return the numbers of this process that are added up across every cluster"""
+
+        member_stats = self.member_cache_stats
+        root_stats = self.root_message_stats
+
+        return {
+            "shards": list(self.shard_ids or []),
+            "guilds": len(self.guilds),
+            "channels": sum(len(guild.channels) for guild in self.guilds),
+            "emojis": len(self.emojis),
+            "users": len(self.users),
+            "memory": Process().memory_info().rss / (1024 ** 2),
+            "cached_guilds": len(self.enso_cache),
+            "member_cache": self.member_cache.get_size()[1],
+            "member_hits": member_stats.hits,
+            "member_misses": member_stats.misses,
+            "member_coalesced": member_stats.coalesced,
+            "member_negative_hits": member_stats.negative_hits,
+            "starboard_messages": self.starboard_messages_cache.get_size()[1],
+            "root_messages": self.root_message_cache.get_size()[1],
+            "root_hits": root_stats.hits,
+            "root_misses": root_stats.misses,
+            "messages_processed": self.messages_processed,
+            "messages_skipped": self.messages_skipped,
+        }
+
+    async def get_line_count(self):
+        """Get the line count of the project, counted in a thread the first time it's needed"""
+
+        if self.line_count is None:
+            self.line_count = await self.loop.run_in_executor(None, line_count)
+
+        return self.line_count
 
     # --------------------------------------------!Cache Section!-------------------------------------------------------
 
     def store_cache(self, guild_id, prefix, modlogs, roles_persist):
         """Storing guild information within cache"""
 
-        self.enso_cache[guild_id] = {"prefix": prefix,
-                                     "modlogs": modlogs,
-                                     "roles_persist": roles_persist}
+        self.enso_cache[guild_id] = GuildConfig(prefix, modlogs, roles_persist)
+        self.prefix_cache.pop(guild_id, None)
 
     def del_cache(self, guild_id):
         """Deleting the entry of the guild within the cache"""
 
         del self.enso_cache[guild_id]
+        self.prefix_cache.pop(guild_id, None)
 
     async def check_cache(self, member_id, guild_id):
-        """Checks if member is in the member cache"""
+        """
+        Checks if member is in the member cache (None when the member has no record)
 
-        # Return key-value pair if member is already in the cache
-        if (member_id, guild_id) in self.member_cache.cache:
-            return self.member_cache.cache[member_id, guild_id]
+        Raises asyncpg.PostgresError when the record couldn't be retrieved, so it's never mistaken for a missing record
+        """
 
+        # Return key-value pair if member is already in the cache
+        if (result := self.member_cache.get_cache((member_id, guild_id))) is not None:
+            self.member_cache_stats.hits += 1
+            return result
+
+        # Don't query again for a member that was recently found to have no record
+        if (member_id, guild_id) in self.member_negative_cache:
+            self.member_cache_stats.negative_hits += 1
+            return None
+
+        # Concurrent misses for the same member share a single query
+        result, shared = await self.member_fetches.do((member_id, guild_id), self.fetch_member, member_id, guild_id)
+        if shared:
+            self.member_cache_stats.coalesced += 1
         else:
-            # Setup pool connection
-            pool = self.db
-            async with pool.acquire() as conn:
+            self.member_cache_stats.misses += 1
 
-                # Get the author's/members row from the Members Table
-                try:
-                    select_query = """SELECT * FROM members WHERE member_id = $1 and guild_id = $2"""
-                    result = await conn.fetchrow(select_query, member_id, guild_id)
+        return result
 
-                # Catch errors
-                except asyncpg.PostgresError as e:
-                    print(f"PostGres Error: Member {member_id} From Guild {guild_id}"
-                          "Record Could Not Be Retrieved When Checking Cache", e)
+    async def fetch_member(self, member_id, guild_id):
+        """Get the member from the database and store it in the member cache"""
+
+        # Setup pool connection
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Get the author's/members row from the Members Table
+            try:
+                result = await conn.fetchrow(queries.SELECT_MEMBER, member_id, guild_id)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: Member {member_id} From Guild {guild_id}"
+                      "Record Could Not Be Retrieved When Checking Cache", e)
+                raise
+
+            # Remember that the member has no record
+            else:
+                if result is None:
+                    self.member_negative_cache.add((member_id, guild_id))
+                    return None
 
                 # Store it in cache
-                else:
-                    dict_items = {"married": result["married"],
-                                  "married_date": result["married_date"],
-                                  "muted_roles": result["muted_roles"],
-                                  "roles": result["roles"]}
-                    self.member_cache.store_cache((member_id, guild_id), dict_items)
+                return self.cache_store_member(member_id, guild_id, result)
+
+    async def get_member_record(self, ctx, member):
+        """
+        Get the record of the member for a command, creating it when the member has none yet
+        (e.g they joined while the bot was offline)
+
+        Returns None after letting the user know when the database couldn't be reached
+        """
+
+        try:
+            if (result := await self.check_cache(member.id, ctx.guild.id)) is None:
+                result = await self.create_member(member.id, ctx.guild.id)
+
+        # Catch errors
+        except asyncpg.PostgresError:
+            await self.generate_embed(ctx, desc="**Something Went Wrong With The Database! Try Again Later**")
+            return None
+
+        return result
+
+    async def create_member(self, member_id, guild_id):
+        """Insert the record of a member that has none and store it in the member cache"""
+
+        # Setup pool connection
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Insert the member, returning the row that's there when it was inserted in the meantime
+            try:
+                row = await conn.fetchrow(queries.CREATE_MEMBER, guild_id, member_id)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: Member {member_id} Could Not Be Inserted Into Guild {guild_id}", e)
+                raise
+
+            # Store it in cache
+            else:
+                self.member_negative_cache.discard((member_id, guild_id))
+                await self.notify_cache(conn, "members", guild_id, [member_id])
+                return self.cache_store_member(member_id, guild_id, row)
+
+    async def check_cache_many(self, member_ids, guild_id):
+        """
+        Checks if many members of the guild are in the member cache
+
+        Every member missing from the cache is loaded with a single query
+        Returns a dict of member id to the member's record (None when the member has no record)
+        Raises asyncpg.PostgresError when the records couldn't be retrieved
+        """
+
+        results = {}
+        missing = []
+        in_flight = []
+
+        for member_id in member_ids:
+            key = (member_id, guild_id)
+            if (result := self.member_cache.get_cache(key)) is not None:
+                self.member_cache_stats.hits += 1
+                results[member_id] = result
+            elif key in self.member_negative_cache:
+                self.member_cache_stats.negative_hits += 1
+                results[member_id] = None
+            # Wait on queries that are already running rather than loading the member twice
+            elif key in self.member_fetches.calls:
+                in_flight.append(member_id)
+            else:
+                missing.append(member_id)
+
+        if missing:
+            self.member_cache_stats.misses += len(missing)
+            results.update(await self.fetch_members(missing, guild_id))
+
+        for member_id in in_flight:
+            results[member_id] = await self.check_cache(member_id, guild_id)
+
+        return results
+
+    async def fetch_members(self, member_ids, guild_id):
+        """Get many members of the guild from the database in one query and store them in the member cache"""
+
+        results = dict.fromkeys(member_ids)
+
+        # Setup pool connection
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Get the rows of all the members from the Members Table
+            try:
+                rows = await conn.fetch(queries.SELECT_MEMBERS, guild_id, member_ids)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: Members From Guild {guild_id}"
+                      "Records Could Not Be Retrieved When Checking Cache", e)
+                raise
+
+            # Store them in cache
+            else:
+                for row in rows:
+                    results[row["member_id"]] = self.cache_store_member(row["member_id"], guild_id, row)
+
+                # Remember the members that have no record
+                for member_id, result in results.items():
+                    if result is None:
+                        self.member_negative_cache.add((member_id, guild_id))
 
-                    return self.member_cache.cache[member_id, guild_id]
+        return results
+
+    def cache_store_member(self, member_id, guild_id, row):
+        """Store the member's row from the database within the member cache"""
+
+        record = MemberRecord(row["married"], row["married_date"], row["muted_roles"], row["roles"])
+        self.member_cache.store_cache((member_id, guild_id), record)
+
+        return record
 
     # --------------------------------------------!End Cache Section!---------------------------------------------------
 
+    # --------------------------------------------!Cache Invalidation Section!------------------------------------------
+
+    async def notify_cache(self, conn, table, guild_id, member_ids=None):
+        """Let the other processes know that rows of the guild have changed, on the connection that changed them"""
+
+        if not CACHE_NOTIFY:
+            return
+
+        try:
+            await self.cache_invalidator.notify(conn, table, guild_id, member_ids)
+
+        # Catch errors
+        except asyncpg.PostgresError as e:
+            print(f"PostGres Error: Cache Invalidation For {table} Could Not Be Sent For Guild {guild_id}", e)
+
+    def on_cache_notification(self, table, guild_id, member_ids):
+        """Update or evict the entries that another process has changed"""
+
+        # Members are loaded on demand, so they only have to be evicted
+        if table == "members":
+            if member_ids is None:
+                self.member_cache.remove_many(guild_id)
+                self.member_negative_cache.remove_many(guild_id)
+            else:
+                for member_id in member_ids:
+                    self.member_cache.remove((member_id, guild_id))
+                    self.member_negative_cache.discard((member_id, guild_id))
+
+        # Every guild is expected to be in the guild caches, so they're reloaded instead
+        # Guilds on shards of other processes aren't cached here
+        elif table in GUILD_TABLES:
+            if self.handles_guild(guild_id):
+                self.loop.create_task(self.reload_guild_cache(table, guild_id))
+
+        else:
+            print(f"Cache Invalidation For Unknown Table {table} Ignored")
+
+    async def reload_guild_cache(self, table, guild_id):
+        """Load the row of the guild from the table into cache again (or remove it when it's been deleted)"""
+
+        # Setup up pool connection
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Get the row of the guild, the table only ever comes from GUILD_TABLES
+            try:
+                row = await conn.fetchrow(queries.SELECT_GUILD_TABLE[table], guild_id)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: {table} Record Could Not Be Reloaded For Guild {guild_id}", e)
+
+            # Update cache
+            else:
+                if table == "guilds":
+                    if row:
+                        self.store_cache(guild_id, row["prefix"], row["modlogs"], row["roles_persist"])
+                    else:
+                        self.enso_cache.pop(guild_id, None)
+                        self.prefix_cache.pop(guild_id, None)
+
+                elif table == "moderatormail":
+                    if row:
+                        self.cache_store_modmail(guild_id, row["modmail_channel_id"], row["message_id"],
+                                                 row["modmail_logging_channel_id"])
+                    else:
+                        self.modmail_cache.pop(guild_id, None)
+
+                elif table == "starboard":
+                    if row:
+                        self.cache_store_starboard(guild_id, row["channel_id"], row["min_stars"])
+                    else:
+                        self.starboard_cache.pop(guild_id, None)
+
+    # --------------------------------------------!End Cache Invalidation Section!--------------------------------------
+
+    # --------------------------------------------!Members Section!-----------------------------------------------------
+
+    async def copy_members(self, conn, guild, member_ids, total=None, skip_existing=True):
+        """
+        Copy the members of the guild that don't have records yet into the members table, chunk by chunk
+
+        Only one chunk of member ids is held at a time, the records themselves are generated as they're copied.
+        When the guild already has records (e.g the bot was in the guild before), the ids in each chunk that
+        already exist are skipped, chunks that exist in full aren't copied at all.
+        Callers that already know the members are missing can pass skip_existing=False to copy them straight away.
+        Members can still join (and be written by the member queue) while the copy is going, so a chunk that runs
+        into a record that exists is copied again without the members that have records by then.
+        Returns the amount of records copied
+        """
+
+        async def existing_ids(chunk):
+            rows = await conn.fetch(queries.SELECT_EXISTING_MEMBER_IDS, guild.id, chunk)
+            return {row["member_id"] for row in rows}
+
+        async def copy_chunk(chunk, existing):
+            records = ((member_id, None, None, guild.id, None, None, None, 0)
+                       for member_id in chunk if member_id not in existing)
+            await conn.copy_records_to_table("members", records=records)
+            return len(chunk) - len(existing)
+
+        guild_exists = skip_existing and await conn.fetchval(queries.MEMBERS_EXIST, guild.id)
+        # Large guilds take a while, so let it be known how far along they are
+        total = total or guild.member_count
+        log_progress = total > MEMBER_COPY_CHUNK_SIZE
+
+        copied = checked = 0
+        member_ids = iter(member_ids)
+        while chunk := list(itertools.islice(member_ids, MEMBER_COPY_CHUNK_SIZE)):
+            checked += len(chunk)
+            if log_progress:
+                print(f"Copying Members From {guild}: {checked} / {total} ({copied} Copied So Far)")
+
+            existing = await existing_ids(chunk) if guild_exists else set()
+            if len(existing) == len(chunk):
+                continue
+
+            # The COPY is rolled back as a whole, so none of the chunk has been written when it's tried again
+            try:
+                copied += await copy_chunk(chunk, existing)
+            except asyncpg.UniqueViolationError:
+                copied += await copy_chunk(chunk, await existing_ids(chunk))
+
+        return copied
+
+    async def reconcile_members(self, conn, guild, mark_left=False):
+        """
+        Bring the members table in line with the members of the guild, writing only what differs
+
+        The ids stored for the guild are loaded with one query and compared with the members of the guild,
+        members without a record are copied in and (with mark_left) members that are gone are marked as left,
+which is skipped for guilds that aren't chunked.
+        Returns the amount of members copied and marked as left
+        """
+
+        rows = await conn.fetch(queries.SELECT_GUILD_MEMBER_IDS, guild.id)
+        stored = {row["member_id"] for row in rows}
+        current = {member.id for member in guild.members}
+
+        missing = current - stored
+        copied = await self.copy_members(conn, guild, missing, total=len(missing), skip_existing=False)
+
+        marked = 0
+        # Only a chunked guild holds every member, otherwise members not cached yet would be marked as left
+        if mark_left and guild.chunked:
+            # Members that already left keep the time and roles they left with
+            gone = [row["member_id"] for row in rows if not row["has_left"] and row["member_id"] not in current]
+            if gone:
+                await conn.execute(queries.MARK_MEMBERS_LEFT, guild.id, gone, datetime.datetime.utcnow())
+                marked = len(gone)
+
+        return copied, marked
+
+    # --------------------------------------------!End Members Section!-------------------------------------------------
+
     # --------------------------------------------!Starboard Section!---------------------------------------------------
 
     def cache_store_starboard(self, guild_id, channel_id, min_stars):
         """Storing starboard within cache"""
 
-        self.starboard_cache[guild_id] = {"channel_id": channel_id,
-                                          "min_stars": min_stars}
+        self.starboard_cache[guild_id] = StarboardConfig(channel_id, min_stars)
 
     def get_starboard_channel(self, guild_id):
         """Returning the starboard channel of the guild"""
 
         starboard = self.starboard_cache.get(guild_id)
-        return starboard.get("channel_id") if starboard else None
+        return starboard.channel_id if starboard else None
 
     def get_starboard_min_stars(self, guild_id):
         """Returning the starboard minimum stars of the guild"""
 
         starboard = self.starboard_cache.get(guild_id)
-        return starboard.get("min_stars") if starboard else None
+        return starboard.min_stars if starboard else None
 
     def update_starboard_channel(self, guild_id, channel_id):
         """Update the starboard channel"""
 
-        self.starboard_cache[guild_id]["channel_id"] = channel_id
+        self.starboard_cache[guild_id].channel_id = channel_id
 
     def update_starboard_min_stars(self, guild_id, min_stars):
         """Update the starboard minimum stars"""
 
-        self.starboard_cache[guild_id]["min_stars"] = min_stars
+        self.starboard_cache[guild_id].min_stars = min_stars
 
     def delete_starboard(self, guild_id):
         """Deleting the starboard of the guild"""
@@ -320,41 +813,103 @@ class Bot(commands.Bot):
         del self.starboard_cache[guild_id]
 
     def delete_starboard_messages(self, in_guild_id):
+        """Deleting all the starboard messages of the guild within the cache"""
 
-        # Array to store keys to be removed
-        keys_to_remove = []
+        self.starboard_messages_cache.remove_many(in_guild_id)
 
-        # For every starboard message in cache
-        for (root_msg_id, guild_id) in self.starboard_messages_cache:
-            # if the guild_id passed in is equal to the guild_id within the cache
-            if in_guild_id == guild_id:
-                # Store key within array
-                keys_to_remove.append((root_msg_id, guild_id))
-
-        # Iterate through the array and then pop the keys from cache
-        for key in keys_to_remove:
-            self.starboard_messages_cache.pop(key)
-
-    def cache_store_starboard_message(self, root_message_id, guild_id, star_message_id):
+    def cache_store_starboard_message(self, root_message_id, guild_id, star_message_id, stars=1):
         """Store the starboard messages within cache"""
 
-        self.starboard_messages_cache[root_message_id, guild_id] = {"star_message_id": star_message_id,
-                                                                    "stars": 1}
+        self.starboard_messages_cache.store_cache((root_message_id, guild_id), StarMessage(star_message_id, stars))
+        # The message has a row now
+        self.starboard_messages_negative_cache.discard((root_message_id, guild_id))
 
     def update_starboard_message_id(self, root_message_id, guild_id, star_message_id):
         """Update the stored starboard message"""
 
-        self.starboard_messages_cache[root_message_id, guild_id]["star_message_id"] = star_message_id
+        # The message is loaded again from the database if it has been evicted since
+        if (message := self.starboard_messages_cache.get_cache((root_message_id, guild_id))) is not None:
+            message.star_message_id = star_message_id
+            # The columnar store hands out copies, so the change has to be stored back
+            self.starboard_messages_cache.store_cache((root_message_id, guild_id), message)
 
     def del_starboard_star_message_id(self, root_message_id, guild_id):
         """Set the star message id to None"""
 
-        self.starboard_messages_cache[root_message_id, guild_id]["star_message_id"] = None
+        if (message := self.starboard_messages_cache.get_cache((root_message_id, guild_id))) is not None:
+            message.star_message_id = None
+            self.starboard_messages_cache.store_cache((root_message_id, guild_id), message)
 
     def update_starboard_message_stars(self, root_message_id, guild_id, reactions):
         """Update the stored starboard message"""
 
-        self.starboard_messages_cache[root_message_id, guild_id]["stars"] = reactions
+        if (message := self.starboard_messages_cache.get_cache((root_message_id, guild_id))) is not None:
+            message.stars = reactions
+            self.starboard_messages_cache.store_cache((root_message_id, guild_id), message)
+        # The count has been written to the database, so there's nothing left to flush for this message
+        self.starboard_dirty_stars.pop((root_message_id, guild_id), None)
+
+    async def save_starboard_message_stars(self, root_message_id, guild_id, stars):
+        """Update the stars of the starboard message in cache and database (straight away or on the next flush)"""
+
+        if STARBOARD_WRITE_BEHIND:
+            # The buffered count outlives the message being evicted from cache
+            if (message := self.starboard_messages_cache.get_cache((root_message_id, guild_id))) is not None:
+                message.stars = stars
+                self.starboard_messages_cache.store_cache((root_message_id, guild_id), message)
+            self.starboard_dirty_stars[root_message_id, guild_id] = stars
+            return
+
+        # Setup up pool connection
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Update the stars that the message has in the database
+            try:
+                await conn.execute(queries.UPDATE_STARBOARD_MESSAGE_STARS, stars, root_message_id, guild_id)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: Starboard_Message Record Could Not Be Updated For Guild {guild_id}", e)
+
+            # Update cache
+            else:
+                self.update_starboard_message_stars(root_message_id, guild_id, stars)
+
+    async def flush_starboard_stars(self):
+        """Write every buffered starboard star count to the database in one query"""
+
+        if not self.starboard_dirty_stars:
+            return
+
+        # Setup up pool connection
+        # The buffer is left alone until there's a connection, so a timed out acquire loses nothing
+        pool = self.db
+        async with pool.acquire() as conn:
+
+            # Another flush may have written everything while waiting for the connection
+            if not self.starboard_dirty_stars:
+                return
+
+            # Swap the buffer out so stars arriving during the write are kept for the next flush
+            dirty, self.starboard_dirty_stars = self.starboard_dirty_stars, {}
+            root_message_ids, guild_ids = zip(*dirty)
+
+            # Update the stars of every message in the database at once
+            try:
+                rowcount = await conn.execute(queries.FLUSH_STARBOARD_MESSAGE_STARS, root_message_ids, guild_ids,
+                                              list(dirty.values()))
+
+            # Catch errors, including the connection being lost
+            # Put the counts back to be retried, unless a newer count came in since
+            except Exception as e:
+                print("Error: Starboard_Message Stars Could Not Be Flushed", e)
+                for key, stars in dirty.items():
+                    self.starboard_dirty_stars.setdefault(key, stars)
+
+            # Print success
+            else:
+                print(rowcount, "Starboard_Message Stars Flushed")
 
     def check_root_message_id(self, root_message_id, guild_id):
         """Check if the original message is stored within the cache"""
@@ -369,9 +924,12 @@ class Bot(commands.Bot):
         """Check if the message is already in the cache"""
 
         # Return value if message is already in the cache
-        if (root_message_id, guild_id) in self.starboard_messages_cache:
-            return self.starboard_messages_cache[root_message_id, guild_id]["star_message_id"], \
-                   self.starboard_messages_cache[root_message_id, guild_id]["stars"]
+        if (message := self.starboard_messages_cache.get_cache((root_message_id, guild_id))) is not None:
+            return message.star_message_id, message.stars
+
+        # Don't query again for a message that was recently found to have no record
+        elif (root_message_id, guild_id) in self.starboard_messages_negative_cache:
+            return None, 0
 
         else:
             # Setup pool connection
@@ -380,8 +938,7 @@ class Bot(commands.Bot):
 
                 # Get the starboard row from the starboard_messages table
                 try:
-                    select_query = """SELECT * FROM starboard_messages WHERE root_message_id = $1 AND guild_id = $2"""
-                    result = await conn.fetchrow(select_query, root_message_id, guild_id)
+                    result = await conn.fetchrow(queries.SELECT_STARBOARD_MESSAGE, root_message_id, guild_id)
 
                 # Catch errors
                 except asyncpg.PostgresError as e:
@@ -390,16 +947,14 @@ class Bot(commands.Bot):
                 # Store it in cache
                 else:
                     if result:
-                        self.starboard_messages_cache[root_message_id, guild_id] = {
-                            "star_message_id": result["star_message_id"],
-                            "stars": result["stars"]}
-
-                        # Returning as separate variables for better readability
-                        star_message_id = self.starboard_messages_cache[root_message_id, guild_id]["star_message_id"]
-                        stars = self.starboard_messages_cache[root_message_id, guild_id]["stars"]
+                        # Stars that haven't been flushed yet are newer than the ones in the database
+                        stars = self.starboard_dirty_stars.get((root_message_id, guild_id), result["stars"])
+                        self.cache_store_starboard_message(root_message_id, guild_id,
+                                                           result["star_message_id"], stars)
 
-                        return star_message_id, stars
+                        return result["star_message_id"], stars
                     else:
+                        self.starboard_messages_negative_cache.add((root_message_id, guild_id))
                         return None, 0
 
     # --------------------------------------------!EndStarboard Section!-------------------------------------------------
@@ -409,9 +964,7 @@ class Bot(commands.Bot):
     def cache_store_modmail(self, guild_id, modmail_channel, message, modmail_logging_channel):
         """Storing all modmail channels within cache"""
 
-        self.modmail_cache[guild_id] = {"modmail_channel_id": modmail_channel,
-                                        "message_id": message,
-                                        "modmail_logging_channel_id": modmail_logging_channel}
+        self.modmail_cache[guild_id] = ModmailConfig(modmail_channel, message, modmail_logging_channel)
 
     def get_modmail(self, guild_id):
         """Returning the modmail system of the guild"""
@@ -421,7 +974,7 @@ class Bot(commands.Bot):
     def update_modmail(self, guild_id, channel_id):
         """Update the modmail channel"""
 
-        self.modmail_cache[guild_id]["modmail_logging_channel_id"] = channel_id
+        self.modmail_cache[guild_id].modmail_logging_channel_id = channel_id
 
     def delete_modmail(self, guild_id):
         """Deleting the modmail system of the guild within the Cache"""
@@ -436,7 +989,7 @@ class Bot(commands.Bot):
         """Returning rolespersist value of the guild"""
 
         role_persist = self.enso_cache.get(guild_id)
-        return role_persist.get("roles_persist") if role_persist else None
+        return role_persist.roles_persist if role_persist else None
 
     async def update_role_persist(self, guild_id, value):
         """Update the rolepersist value of the guild (Enabled or Disabled)"""
@@ -456,7 +1009,8 @@ class Bot(commands.Bot):
 
             # Store in cache
             else:
-                self.enso_cache[guild_id]["roles_persist"] = value
+                self.enso_cache[guild_id].roles_persist = value
+                await self.notify_cache(conn, "guilds", guild_id)
 
     # --------------------------------------------!End RolePersist Section!---------------------------------------------
 
@@ -490,18 +1044,19 @@ class Bot(commands.Bot):
                                               desc=f"Modlog Channel for **{ctx.guild}** has been updated to <#{channel_id}>")
 
                 # Store in cache
-                self.enso_cache[ctx.guild.id]["modlogs"] = channel_id
+                self.enso_cache[ctx.guild.id].modlogs = channel_id
+                await self.notify_cache(conn, "guilds", ctx.guild.id)
 
     def remove_modlog_channel(self, guild_id):
         """Remove the value of modlog for the guild specified"""
 
-        self.enso_cache[guild_id]["modlogs"] = None
+        self.enso_cache[guild_id].modlogs = None
 
     def get_modlog_for_guild(self, guild_id):
         """Get the modlog channel of the guild that the user is in"""
 
         modlogs = self.enso_cache.get(guild_id)
-        return modlogs.get("modlogs") if modlogs else None
+        return modlogs.modlogs if modlogs else None
 
     # --------------------------------------------!End ModLogs Section!-------------------------------------------------
 
@@ -529,16 +1084,36 @@ class Bot(commands.Bot):
                 await self.generate_embed(ctx, desc=f"Guild prefix has been updated to **{prefix}**")
 
                 # Store in cache
-                self.enso_cache[ctx.guild.id]["prefix"] = prefix
+                self.enso_cache[ctx.guild.id].prefix = prefix
+                self.prefix_cache.pop(ctx.guild.id, None)
+                await self.notify_cache(conn, "guilds", ctx.guild.id)
 
     def get_prefix_for_guild(self, guild_id):
         """Get the prefix of the guild that the user is in"""
 
-        prefix = self.enso_cache[guild_id]["prefix"]
-        if prefix:
-            return prefix
+        # Guilds that haven't been stored (yet) use the default prefix
+        guild = self.enso_cache.get(guild_id)
+        if guild and guild.prefix:
+            return guild.prefix
         return "."
 
+    def get_prefixes_for_guild(self, guild_id):
+        """Get every prefix (mentions included) that commands can be used with in the guild"""
+
+        # Built once per guild, until the prefix of the guild is changed
+        if (prefixes := self.prefix_cache.get(guild_id)) is None:
+            prefixes = (f"<@{self.user.id}> ", f"<@!{self.user.id}> ", self.get_prefix_for_guild(guild_id))
+            self.prefix_cache[guild_id] = prefixes
+
+        return prefixes
+
+    def could_be_command(self, message):
+        """Return whether the message starts with one of the prefixes, without building a context for it"""
+
+        if message.guild is None:
+            return message.content.startswith(".")
+        return message.content.startswith(self.get_prefixes_for_guild(message.guild.id))
+
     # --------------------------------------------!End Prefixes Section!------------------------------------------------
 
     # --------------------------------------------!Roles/Colour/Embed Section!------------------------------------------
@@ -555,59 +1130,104 @@ class Bot(commands.Bot):
         embed = Embed(description=desc,
                       colour=self.admin_colour)
 
-        await ctx.send(embed=embed)
+        return await ctx.send(embed=embed)
 
     async def store_roles(self, target, ctx, member):
-        """Storing user roles within database"""
+        """Storing user roles within database, returning whether they were stored"""
+
+        return await self.store_roles_many([target], ctx.guild)
 
-        role_ids = ", ".join([str(r.id) for r in target.roles])
+    async def store_roles_many(self, targets, guild):
+        """
+        Storing the roles of many members within the database in one query
+
+        Returns whether they were stored, the members can't be given their roles back when they weren't
+        """
+
+        if not targets:
+            return True
+
+        member_ids = [target.id for target in targets]
+        role_ids = [", ".join([str(r.id) for r in target.roles]) for target in targets]
 
         # Setup up pool connection
         pool = self.db
         async with pool.acquire() as conn:
 
-            # Query to store existing roles of the member within the database
+            # Query to store existing roles of the members within the database
             try:
-                update_query = """UPDATE members SET muted_roles = $1 WHERE guild_id = $2 AND member_id = $3"""
-                rowcount = await conn.execute(update_query, role_ids, ctx.guild.id, member.id)
-                result = await self.check_cache(member.id, member.guild.id)
+                rowcount = await conn.execute(queries.STORE_MUTED_ROLES, member_ids, role_ids, guild.id)
 
             # Catch errors
             except asyncpg.PostgresError as e:
-                print(f"PostGres Error: Roles Could Not Be Stored For Member {member.id} in Guild {member.guild.id}", e)
+                print(f"PostGres Error: Roles Could Not Be Stored For Members {member_ids} in Guild {guild.id}", e)
+                return False
 
             # Print success
-            # Update cache
+            # Update the members that are already cached, the rest will be loaded with their new roles
             else:
-                result["muted_roles"] = role_ids
-                print(rowcount, f"Roles Added For User {member} in {ctx.guild}")
+                for member_id, roles in zip(member_ids, role_ids):
+                    if (result := self.member_cache.get_cache((member_id, guild.id))) is not None:
+                        result.muted_roles = roles
+                await self.notify_cache(conn, "members", guild.id, member_ids)
+                print(rowcount, f"Roles Added For Users {member_ids} in {guild}")
+                return True
 
     async def clear_roles(self, member):
         """Clear the roles when the user has been unmuted"""
 
+        await self.clear_roles_many([member], member.guild)
+
+    async def clear_roles_many(self, members, guild):
+        """Clear the roles of many members in one query when they have been unmuted"""
+
+        if not members:
+            return
+
+        member_ids = [member.id for member in members]
+
         # Setup up pool connection
         pool = self.db
         async with pool.acquire() as conn:
 
-            # Query to clear the existing role of the member from the database
+            # Query to clear the existing roles of the members from the database
             try:
-                update = """UPDATE members SET muted_roles = NULL WHERE guild_id = $1 AND member_id = $2"""
-                rowcount = await conn.execute(update, member.guild.id, member.id)
-                result = await self.check_cache(member.id, member.guild.id)
+                rowcount = await conn.execute(queries.CLEAR_MUTED_ROLES, guild.id, member_ids)
 
             # Catch error
             except asyncpg.PostgresError as e:
-                print(f"PostGres Error: Roles Could Not Be Cleared for Member {member.id} in Guild {member.guild.id}",
-                      e)
+                print(f"PostGres Error: Roles Could Not Be Cleared for Members {member_ids} in Guild {guild.id}", e)
 
             # Print success
-            # Update cache
+            # Update the members that are already cached
             else:
-                result["muted_roles"] = None
-                print(rowcount, f"Roles Cleared For User {member} in {member.guild.name}")
+                for member_id in member_ids:
+                    if (result := self.member_cache.get_cache((member_id, guild.id))) is not None:
+                        result.muted_roles = None
+                await self.notify_cache(conn, "members", guild.id, member_ids)
+                print(rowcount, f"Roles Cleared For Users {member_ids} in {guild.name}")
 
     # --------------------------------------------!End Roles/Colour/Embed Section!--------------------------------------
 
+    async def close(self):
+        """Flush anything buffered for the database before shutting down"""
+
+        # The pool may already have been closed (e.g by the restart command) or the database can't be reached
+        # Shutting down carries on either way
+        try:
+            await self.flush_starboard_stars()
+        except Exception as e:
+            print("Starboard_Message Stars Could Not Be Flushed On Shutdown", e)
+
+        # The bot is logged out even when a connection can't be closed cleanly
+        try:
+            await self.member_queue.close()
+            await self.cache_invalidator.close()
+            if self.cluster:
+                await self.cluster.close()
+        finally:
+            await super().close()
+
     def execute(self):
         """Load the cogs and then run the bot"""
 
@@ -18,142 +18,266 @@
 
 # TODO: UPDATE ALL COMMENTARY TO REFLECT OUR WORK
 
+import asyncio
 import threading
+import time
+from collections import OrderedDict
 
 
-class CachingCircularQueue:
-    # When this lock is enabled, only the function it was called in can change
-    # The state of this class
-    threadLock = threading.Lock()
+class GuildIndex:
+    """Secondary index of guild_id to the (id, guild_id) keys stored for that guild"""
 
-    def __init__(self, size):
-        # The current queue
-        self.values = []
-        # The maximum size of the queue
+    def __init__(self):
+        self.guilds = {}
+
+    def add(self, key):
+        """Index the key under its guild"""
+
+        self.guilds.setdefault(key[1], set()).add(key)
+
+    def discard(self, key):
+        """Remove the key from the index of its guild"""
+
+        keys = self.guilds.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            # Don't keep empty sets around for guilds with nothing stored
+            if not keys:
+                del self.guilds[key[1]]
+
+    def pop_guild(self, guild_id):
+        """Remove and return every key stored for the guild"""
+
+        return self.guilds.pop(guild_id, set())
+
+
+class CacheStats:
+    """Counters of how often a cache is able to answer without the database"""
+
+    __slots__ = ("hits", "misses", "coalesced", "negative_hits")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        # Misses that waited on a query that was already in flight instead of running their own
+        self.coalesced = 0
+        # Lookups answered by remembering that the row doesn't exist
+        self.negative_hits = 0
+
+    def hit_rate(self):
+        """Percentage of lookups that were answered from the cache"""
+
+        answered = self.hits + self.negative_hits
+        total = answered + self.misses + self.coalesced
+        return answered / total * 100 if total else 0.0
+
+
+class SingleFlight:
+    """Share one in-flight coroutine between concurrent callers that ask for the same key"""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key, func, *args):
+        """
+        Await func(*args), or the call already running for this key
+
+        Returns the result along with whether it was shared with another caller
+        """
+
+        if (future := self.calls.get(key)) is not None:
+            return await asyncio.shield(future), True
+
+        future = asyncio.ensure_future(func(*args))
+        self.calls[key] = future
+        # Forget the call once it's done so the next miss queries again
+        future.add_done_callback(lambda _: self.calls.pop(key, None))
+
+        # Shielded so a caller being cancelled doesn't cancel the query for everyone else
+        return await asyncio.shield(future), False
+
+
+class NegativeCache:
+    """Remembers (id, guild_id) keys that have no row in the database, for a short amount of time"""
+
+    def __init__(self, ttl, size):
+        # How many seconds a key is remembered as missing
+        self.ttl = ttl
         self.MAX_SIZE = size
+        # Key to the time it expires, in the order they were added
+        self.expiries = OrderedDict()
+        self.guild_index = GuildIndex()
 
-    def push(self, value):
-        # thread safe
-        with self.threadLock:
-            # If the current size is less than the max size:
-            if len(self.values) < self.MAX_SIZE:
-                # Add the value to the end of the queue
-                self.values.append(value)
-                # Return None as the default return value of Push
-                return None
-            else:
-                # If the queue is full, add the value to the end of the list
-                self.values.append(value)
-                # Then remove and return the item at the start of the list
-                # Therefore we don't need to touch the size
-                return self.values.pop(0)
-
-    def pop(self):
-        # thread safe
-        with self.threadLock:
-            # should never try to pop an empty queue, you fucked up
-            assert len(self.values) > 0
-            # decrement the size
-            # return the first value of the array
-            return self.values.pop(0)
-
-    def remove(self, value):
-        # To my knowledge, this method can be called when deleting a single member and many members???
-        # So this should only be called to remove a single member at a time
-        with self.threadLock:
-            # Remove the value inside the array (value will be a tuple that is passed in)
-            # PRECONDITION, VALUE EXISTS IN CACHE, SO SHOULD EXIST IN LIST
-            if value in self.values:
-                self.values.remove(value)
+    def __contains__(self, key):
+        expiry = self.expiries.get(key)
+        if expiry is None:
+            return False
+
+        # Forget the key once it has expired so the database is checked again
+        if expiry <= time.monotonic():
+            self.discard(key)
+            return False
+
+        return True
+
+    def __len__(self):
+        return len(self.expiries)
+
+    def add(self, key):
+        """Remember that the key has no row in the database"""
+
+        if key in self.expiries:
+            self.expiries.move_to_end(key)
+        else:
+            self.guild_index.add(key)
+        self.expiries[key] = time.monotonic() + self.ttl
+
+        # Drop the oldest key when full
+        if len(self.expiries) > self.MAX_SIZE:
+            evicted, _ = self.expiries.popitem(last=False)
+            self.guild_index.discard(evicted)
+
+    def discard(self, key):
+        """Forget the key, to be called when a row is inserted for it"""
+
+        if self.expiries.pop(key, None) is not None:
+            self.guild_index.discard(key)
+
+    def remove_many(self, in_guild_id):
+        """Forget every key of the guild, to be called when rows are inserted for the whole guild"""
+
+        for key in self.guild_index.pop_guild(in_guild_id):
+            del self.expiries[key]
+
+    def clear(self):
+        """Forget every key, to be called when rows could have been inserted without being told"""
+
+        self.expiries.clear()
+        self.guild_index = GuildIndex()
 
 
 class MyCoolCache:
-    threadLock = threading.Lock()
+    """
+    LRU cache used from coroutines running on the bot's event loop
+
+    None of the methods await, so each call runs to completion on the loop
+    without being interleaved with another one and no locking is needed.
+    Wrap it in ThreadSafeCache when it has to be shared with other threads.
+    """
 
     def __init__(self, size):
+        # The maximum size of the cache
         self.MAX_SIZE = size
-        self.queue = CachingCircularQueue(size)
-        self.cache = {}
+        # Keys are kept in order of use, least recently used at the front
+        # So evicting and promoting a key are both O(1)
+        self.cache = OrderedDict()
+        # Keys stored per guild, so that a guild can be removed without scanning the whole cache
+        self.guild_index = GuildIndex()
+
+    def __contains__(self, key):
+        return key in self.cache
 
     def get_size(self):
         """Return size of cache and queue"""
 
-        return self.MAX_SIZE, len(self.cache), len(self.queue.values)
+        # The ordering of the cache is the queue, so both lengths are the same
+        return self.MAX_SIZE, len(self.cache), len(self.cache)
+
+    def get_cache(self, key):
+        """Return the value stored in cache (or None) and mark it as most recently used"""
+
+        value = self.cache.get(key)
+        # Promote the key so it is evicted last
+        if value is not None:
+            self.cache.move_to_end(key)
+
+        return value
 
     def change_array_size(self, input_size):
         """Dynamically change the size of the array"""
 
-        # Making it thread-safe
-        with self.threadLock:
+        self.MAX_SIZE = input_size
+
+        # Evict the least recently used records until the cache fits within the new size
+        while len(self.cache) > input_size:
+            key, _ = self.cache.popitem(last=False)
+            self.guild_index.discard(key)
+
+    def store_cache(self, key, dict_item):
+        """Store the value in queue/cache"""
+
+        # Storing an existing key counts as using it
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        else:
+            self.guild_index.add(key)
+        self.cache[key] = dict_item
+
+        # If the cache is full, remove the least recently used record entirely
+        if len(self.cache) > self.MAX_SIZE:
+            evicted, _ = self.cache.popitem(last=False)
+            self.guild_index.discard(evicted)
+
+    def remove(self, key):
+        """Remove a single record from the cache"""
+
+        if self.cache.pop(key, None) is not None:
+            self.guild_index.discard(key)
+
+    def remove_many(self, in_guild_id):
+        # This method is to be used for when the bot has left a guild
+        # Only the keys stored for this guild are touched
+        for key in self.guild_index.pop_guild(in_guild_id):
+            del self.cache[key]
+
+    def clear(self):
+        """Remove every record from the cache"""
+
+        self.cache.clear()
+        self.guild_index = GuildIndex()
+
 
-            # Increase the size of the array and the cache to the new size
-            if input_size > self.MAX_SIZE:
-                self.queue.MAX_SIZE = input_size
-                self.MAX_SIZE = input_size
+class ThreadSafeCache:
+    """
+    Wrapper that serialises access to a MyCoolCache for callers running outside the event loop (executors)
 
-            # Increase the size of the array while
-            # it's greater than the queue and
-            # less than the max value of the cache
-            elif self.MAX_SIZE > input_size > len(self.queue.values):
-                self.queue.MAX_SIZE = input_size
-                self.MAX_SIZE = input_size
+    Once a cache is shared with another thread, every caller (including the
+    coroutines on the loop) has to go through the same wrapper.
+    """
 
-            # Decrease the size of the queue and pop values in cache
-            else:
-                # Split Array into 2 and iterate through the queue and delete things
-                for value in self.queue.values[input_size:]:
-                    self.cache.pop(value)
+    def __init__(self, cache):
+        self.inner = cache
+        # Only this wrapper's callers contend for this lock
+        self.threadLock = threading.Lock()
+
+    def __contains__(self, key):
+        with self.threadLock:
+            return key in self.inner
+
+    def get_size(self):
+        with self.threadLock:
+            return self.inner.get_size()
 
-                # Make sure only the records up until the size specified are stored
-                self.queue.values = self.queue.values[:input_size]
+    def get_cache(self, key):
+        with self.threadLock:
+            return self.inner.get_cache(key)
 
-                # Set max size of queue and cache to be the length of the new queue
-                self.queue.MAX_SIZE = len(self.queue.values)
-                self.MAX_SIZE = input_size
+    def change_array_size(self, input_size):
+        with self.threadLock:
+            self.inner.change_array_size(input_size)
 
     def store_cache(self, key, dict_item):
-        """Store the value in queue/cache"""
+        with self.threadLock:
+            self.inner.store_cache(key, dict_item)
 
+    def remove(self, key):
         with self.threadLock:
-            has_key = True
-            # Assume the key exists in the cache
-            if key in self.cache:
-                # If the key is None, aka removed
-                if self.cache[key] is None:
-                    has_key = False
-            else:
-                # Or doesn't exist
-                has_key = False
-
-            # Then we don't have the key.
-            # In this case, we have to check if adding a key will exceed max size
-            if not has_key:
-                key_to_delete = self.queue.push(key)
-                # If the key is not None, that means the queue was full. We must delete an item.
-
-                if key_to_delete is not None:
-                    self.cache[key_to_delete] = None
-            self.cache[key] = dict_item
+            self.inner.remove(key)
 
     def remove_many(self, in_guild_id):
-        # This method is to be used for when the bot has left a guild
         with self.threadLock:
-            # Array to store keys to be removed
-            keys_to_remove = []
-
-            # For every member within the cache
-            for (member_id, guild_id) in self.cache:
-                # if the guild_id passed in is equal to the guild_id within the cache
-                if in_guild_id == guild_id:
-                    # When removing a value from the cache due to a guild leave, permanently remove all values
-                    # Yes it is expensive, however as this can run concurrently and we won't need the data available
-                    # For this guild, it doesn't matter how long it takes, and will save in memory in the long term
-
-                    # Store key within array
-                    keys_to_remove.append((member_id, guild_id))
-                    # Remove the key from the queue
-                    self.queue.remove((member_id, guild_id))
-
-            # Iterate through the array and then pop the keys from cache
-            for key in keys_to_remove:
-                self.cache.pop(key)
+            self.inner.remove_many(in_guild_id)
+
+    def clear(self):
+        with self.threadLock:
+            self.inner.clear()
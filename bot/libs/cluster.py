@@ -0,0 +1,74 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+import json
+
+
+class ClusterClient:
+    """
+    Connection of a worker process to the launcher over its UNIX socket
+
+    Each exchange sends a line of JSON with the stats of this process and gets back the
+    latest stats of every cluster, which are summed up for the cluster-wide numbers.
+    """
+
+    def __init__(self, cluster_id, path):
+        self.cluster_id = cluster_id
+        self.path = path
+        self.reader = None
+        self.writer = None
+        # The latest stats of every cluster connected to the launcher, by cluster id
+        self.clusters = {}
+
+    async def exchange(self, stats):
+        """Send the stats of this process and receive the stats of every cluster"""
+
+        # (Re)connect when the launcher has been restarted or the connection was lost
+        if self.writer is None or self.writer.is_closing():
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+
+        try:
+            self.writer.write(json.dumps({"cluster_id": self.cluster_id, "stats": stats}).encode() + b"\n")
+            await self.writer.drain()
+
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionResetError("The launcher closed the connection")
+            self.clusters = json.loads(line)
+
+        # Start over with a new connection next time
+        except (OSError, ValueError):
+            await self.close()
+            raise
+
+    def totals(self):
+        """Return the sum of every number reported by the clusters"""
+
+        totals = {}
+        for stats in self.clusters.values():
+            for name, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[name] = totals.get(name, 0) + value
+
+        return totals
+
+    async def close(self):
+        """Close the connection to the launcher"""
+
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
@@ -0,0 +1,218 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import asyncio
+from collections import defaultdict
+
+from bot.libs import queries
+
+JOIN = "join"
+LEAVE = "leave"
+
+
+class MemberEvent:
+    """Member joining or leaving a guild, waiting to be written"""
+
+    __slots__ = ("kind", "guild_id", "member_id", "roles", "left_at", "futures")
+
+    def __init__(self, kind, guild_id, member_id, roles, left_at, future):
+        self.kind = kind
+        self.guild_id = guild_id
+        self.member_id = member_id
+        self.roles = roles
+        self.left_at = left_at
+        # Resolved once the event has been written, events collapsed into this one share it
+        self.futures = [future]
+
+    def resolve(self, result):
+        for future in self.futures:
+            if not future.done():
+                future.set_result(result)
+
+    def fail(self, exception):
+        for future in self.futures:
+            if not future.done():
+                future.set_exception(exception)
+
+
+class MemberIngestQueue:
+    """
+    Collects members joining and leaving guilds for a few milliseconds and writes them in batches
+
+    Every flush takes a single connection from the pool and writes all the joins and all the leaves with one query each,
+    so a join storm costs a constant amount of connections and writes rather than one of each per member.
+    Events of the same member are written in the order they came in, so a member that leaves and joins again within
+    the same batch still gets back the roles they left with.
+    """
+
+    def __init__(self, notify, delay, batch_size):
+        # Called with (conn, "members", guild_id, member_ids) for every guild written to
+        self.notify = notify
+        # How long (in seconds) events are collected for before being written, 0 writes them on the next loop iteration
+        self.delay = delay
+        # Events are written straight away once this many are waiting
+        self.batch_size = batch_size
+        # The pool to write with, set once it has been created
+        self.pool = None
+
+        # Events in the order they came in
+        self.pending = []
+        self.timer = None
+        # Flushes are written one at a time, so events of a member never race each other
+        self.lock = asyncio.Lock()
+
+        # Stats
+        self.events = 0
+        self.flushes = 0
+        self.writes = 0
+
+    async def join(self, guild_id, member_id):
+        """
+        Write the member joining the guild, returning the roles they had when they last left (or None)
+
+        Raises whatever stopped the batch from being written, database errors or otherwise
+        """
+
+        return await self.add(JOIN, guild_id, member_id)
+
+    async def leave(self, guild_id, member_id, roles, left_at):
+        """Write the member leaving the guild along with their roles, raising like join does"""
+
+        await self.add(LEAVE, guild_id, member_id, roles, left_at)
+
+    def add(self, kind, guild_id, member_id, roles=None, left_at=None):
+        """Queue the event, returning the future that is resolved once it has been written"""
+
+        future = asyncio.get_event_loop().create_future()
+        self.pending.append(MemberEvent(kind, guild_id, member_id, roles, left_at, future))
+        self.events += 1
+
+        if len(self.pending) >= self.batch_size:
+            self.schedule(0)
+        elif self.timer is None:
+            self.schedule(self.delay)
+
+        return future
+
+    def schedule(self, delay):
+        """Flush the queue after the delay, unless it's already going to be flushed sooner"""
+
+        if self.timer is not None:
+            if delay > 0:
+                return
+            self.timer.cancel()
+
+        loop = asyncio.get_event_loop()
+        self.timer = loop.call_later(delay, lambda: loop.create_task(self.flush()))
+
+    @staticmethod
+    def rounds(events):
+        """
+        Split the events into rounds that are written one after the other, with each member at most once per round
+
+        A join straight after a join of the same member (e.g events replayed after a reconnect) has nothing left
+        to write, it's given no roles without being written again.
+        Leaves straight after a leave are written once, with the newest roles
+        """
+
+        # The events of each member that still have to be written, in order
+        members = defaultdict(list)
+
+        for event in events:
+            queued = members[event.guild_id, event.member_id]
+
+            if queued and queued[-1].kind == event.kind:
+                if event.kind == JOIN:
+                    event.resolve(None)
+                else:
+                    event.futures += queued[-1].futures
+                    queued[-1] = event
+                continue
+
+            queued.append(event)
+
+        rounds = []
+        for queued in members.values():
+            for i, event in enumerate(queued):
+                if i == len(rounds):
+                    rounds.append([])
+                rounds[i].append(event)
+
+        return rounds
+
+    async def flush(self):
+        """Write every queued event to the database"""
+
+        async with self.lock:
+            self.timer = None
+            if not self.pending:
+                return
+
+            # Swap the queue out so events arriving during the write are kept for the next flush
+            events, self.pending = self.pending, []
+            rounds = self.rounds(events)
+            self.flushes += 1
+
+            try:
+                async with self.pool.acquire() as conn:
+                    for events in rounds:
+                        await self.write(conn, events)
+
+            # Every event that hasn't been written yet fails along with the round, nobody is left waiting
+            except Exception as e:
+                for events in rounds:
+                    for event in events:
+                        event.fail(e)
+
+    async def write(self, conn, events):
+        """Write one round of events, with a query for the joins and one for the leaves"""
+
+        joins = [event for event in events if event.kind == JOIN]
+        leaves = [event for event in events if event.kind == LEAVE]
+
+        # Each join is given back the roles stored when the member left
+        if joins:
+            rows = await conn.fetch(queries.JOIN_MEMBERS,
+                                    [event.guild_id for event in joins], [event.member_id for event in joins])
+            self.writes += 1
+
+            previous = {(row["guild_id"], row["member_id"]): row["roles"] for row in rows}
+            for event in joins:
+                event.resolve(previous.get((event.guild_id, event.member_id)))
+
+        if leaves:
+            await conn.execute(queries.LEAVE_MEMBERS,
+                               [event.guild_id for event in leaves], [event.member_id for event in leaves],
+                               [event.roles for event in leaves], [event.left_at for event in leaves])
+            self.writes += 1
+
+            for event in leaves:
+                event.resolve(None)
+
+        # Let the other processes know which members of each guild have changed
+        guilds = defaultdict(list)
+        for event in events:
+            guilds[event.guild_id].append(event.member_id)
+        for guild_id, member_ids in guilds.items():
+            await self.notify(conn, "members", guild_id, member_ids)
+
+    async def close(self):
+        """Write anything still queued"""
+
+        if self.timer is not None:
+            self.timer.cancel()
+        if self.pool is not None:
+            await self.flush()
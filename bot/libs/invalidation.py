@@ -0,0 +1,89 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import uuid
+
+from bot.libs import queries
+
+# NOTIFY payloads have to be shorter than 8000 bytes, past this many members the whole guild is invalidated instead
+MAX_MEMBER_IDS = 300
+
+
+class CacheInvalidator:
+    """
+    Keeps the caches of every process using the same database in sync through Postgres LISTEN/NOTIFY
+
+    Writers call notify on the connection that made the change, every other process
+    listening on the channel gets the table and guild (and members) that changed passed to its handler.
+    Any connection with add_listener/remove_listener/execute (e.g a stand-in within tests) can be used.
+    """
+
+    def __init__(self, channel, handler):
+        self.channel = channel
+        # Called with (table, guild_id, member_ids), member_ids is None when the whole guild changed
+        self.handler = handler
+        # Identifies the notifications sent by this process, which don't need to be handled again
+        self.origin = uuid.uuid4().hex
+        # The connection dedicated to listening
+        self.conn = None
+
+    def payload(self, table, guild_id, member_ids=None):
+        """Return the notification for the change as JSON"""
+
+        if member_ids is not None and len(member_ids) > MAX_MEMBER_IDS:
+            member_ids = None
+
+        return json.dumps({"origin": self.origin, "table": table, "guild_id": guild_id,
+                           "member_ids": None if member_ids is None else list(member_ids)})
+
+    async def notify(self, conn, table, guild_id, member_ids=None):
+        """Let every other process know that the rows of the guild (or members) have changed"""
+
+        await conn.execute(queries.NOTIFY_CACHE, self.channel, self.payload(table, guild_id, member_ids))
+
+    async def listen(self, conn):
+        """Start listening for notifications on the connection"""
+
+        await conn.add_listener(self.channel, self.on_notification)
+        self.conn = conn
+
+    def is_listening(self):
+        """Return whether the listening connection is still open"""
+
+        return self.conn is not None and not self.conn.is_closed()
+
+    async def close(self):
+        """Stop listening and close the connection"""
+
+        if self.is_listening():
+            await self.conn.remove_listener(self.channel, self.on_notification)
+            await self.conn.close()
+        self.conn = None
+
+    def on_notification(self, conn, pid, channel, payload):
+        """Pass the notifications sent by other processes on to the handler"""
+
+        try:
+            message = json.loads(payload)
+            origin, table, guild_id, member_ids = (message["origin"], message["table"],
+                                                   message["guild_id"], message["member_ids"])
+        except (ValueError, KeyError) as e:
+            print(f"Cache Invalidation Could Not Be Read: {payload!r}", e)
+            return
+
+        if origin != self.origin:
+            self.handler(table, guild_id, member_ids)
@@ -0,0 +1,98 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import pathlib
+
+# Where the counts of each file are kept between restarts
+CACHE_FILE = ".line_count_cache.json"
+# Directories that aren't part of the project
+IGNORED_DIRS = ("venv", ".local")
+
+
+def count_file(file_dir):
+    """Count the code/commentary/blank lines of a single file"""
+
+    code = 0
+    comments = 0
+    blank = 0
+
+    with open(file_dir, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip().startswith("#"):
+                comments += 1
+            elif not line.strip():
+                blank += 1
+            else:
+                code += 1
+
+    return code, comments, blank
+
+
+def line_count(root=".", cache_file=CACHE_FILE):
+    """
+    Getting the line count of the project
+
+    Counts of every file are cached on disk along with the file's mtime and size,
+    so only files that have changed since the last count are read again
+    """
+
+    try:
+        with open(cache_file, "r", encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        cached = {}
+
+    counts = {}
+    for path, dirs, files in os.walk(root):
+        # Don't descend into the venv (or anything else ignored) at all
+        dirs[:] = [name for name in dirs if not any(ignored in name for ignored in IGNORED_DIRS)]
+
+        for name in files:
+            if not name.endswith(".py"):
+                continue
+
+            file_dir = str(pathlib.PurePath(path, name))
+            stat = os.stat(file_dir)
+
+            # Reuse the count if the file hasn't changed
+            entry = cached.get(file_dir)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                counts[file_dir] = entry
+            else:
+                counts[file_dir] = [stat.st_mtime_ns, stat.st_size, *count_file(file_dir)]
+
+    # Only write the cache when something has changed
+    if counts != cached:
+        try:
+            with open(cache_file, "w", encoding="utf-8") as file:
+                json.dump(counts, file)
+        except OSError as e:
+            print("Line Count Could Not Be Cached", e)
+
+    code = sum(entry[2] for entry in counts.values())
+    comments = sum(entry[3] for entry in counts.values())
+    blank = sum(entry[4] for entry in counts.values())
+
+    # Adding up the total lines of code
+    total = comments + blank + code
+
+    return f"Code: {code}\n" \
+           f"Commentary: {comments}\n" \
+           f"Blank: {blank}\n" \
+           f"Total: {total}\n" \
+           f"Files: {len(counts)}"
@@ -0,0 +1,176 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from bot.libs.queries import NAMES
+
+
+@lru_cache(maxsize=1024)
+def query_name(query):
+    """Name a query by its name in bot.libs.queries, or its command and table, e.g UPDATE starboard_messages"""
+
+    if query in NAMES:
+        return NAMES[query]
+
+    words = query.split()
+    if not words:
+        return "EMPTY"
+
+    command = words[0].upper()
+    if command == "UPDATE" and len(words) > 1:
+        return f"UPDATE {words[1]}"
+
+    # SELECT/DELETE name the table after FROM and INSERT after INTO, skipping subqueries
+    keyword = "INTO" if command == "INSERT" else "FROM"
+    for word, table in zip(words, words[1:]):
+        if word.upper() == keyword and not table.startswith("("):
+            return f"{command} {table}"
+
+    # Such as SELECT pg_notify($1, $2)
+    return f"{command} {words[1].split('(')[0]}" if len(words) > 1 else command
+
+
+class LatencyStats:
+    """Count, failures and the latest latencies of something done with the database"""
+
+    __slots__ = ("samples", "count", "failures", "total")
+
+    def __init__(self, size):
+        # Percentiles are worked out from the latest samples only, so they follow what the pool is doing now
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.failures = 0
+        self.total = 0.0
+
+    def record(self, seconds, failed=False):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if failed:
+            self.failures += 1
+
+    def percentiles(self, *percents):
+        """Return the latencies (in seconds) at the given percentiles of the latest samples"""
+
+        if not self.samples:
+            return tuple(0.0 for _ in percents)
+
+        ordered = sorted(self.samples)
+        # Nearest rank
+        return tuple(ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] for percent in percents)
+
+
+class InstrumentedConnection:
+    """Connection handed out by InstrumentedPool, timing every query made with it"""
+
+    def __init__(self, conn, pool):
+        self.conn = conn
+        self.pool = pool
+
+    def __getattr__(self, name):
+        # Transactions, cursors etc are used as they are
+        return getattr(self.conn, name)
+
+    async def timed(self, name, method, *args, **kwargs):
+        """Run the query and record how long it took under its name"""
+
+        start = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception:
+            self.pool.record(name, time.perf_counter() - start, failed=True)
+            raise
+
+        self.pool.record(name, time.perf_counter() - start)
+        return result
+
+    async def execute(self, query, *args, **kwargs):
+        return await self.timed(query_name(query), self.conn.execute, query, *args, **kwargs)
+
+    async def executemany(self, query, *args, **kwargs):
+        return await self.timed(query_name(query), self.conn.executemany, query, *args, **kwargs)
+
+    async def fetch(self, query, *args, **kwargs):
+        return await self.timed(query_name(query), self.conn.fetch, query, *args, **kwargs)
+
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self.timed(query_name(query), self.conn.fetchrow, query, *args, **kwargs)
+
+    async def fetchval(self, query, *args, **kwargs):
+        return await self.timed(query_name(query), self.conn.fetchval, query, *args, **kwargs)
+
+    async def copy_records_to_table(self, table_name, **kwargs):
+        return await self.timed(f"COPY {table_name}", self.conn.copy_records_to_table, table_name, **kwargs)
+
+
+class InstrumentedPool:
+    """
+    Wrapper around an asyncpg pool recording how long connections are waited for
+    and how long/how often each query takes/fails, to tell when the pool is saturated
+    """
+
+    def __init__(self, pool, max_size, acquire_timeout=None, samples=1000):
+        self.pool = pool
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.samples = samples
+
+        self.acquire_stats = LatencyStats(samples)
+        # LatencyStats of every query, by query_name
+        self.query_stats = {}
+        # Connections currently acquired and callers currently waiting for one
+        self.in_use = 0
+        self.waiting = 0
+
+    def __getattr__(self, name):
+        # close(), terminate() etc go straight to the pool
+        return getattr(self.pool, name)
+
+    def record(self, name, seconds, failed=False):
+        """Record the latency of a query"""
+
+        if (stats := self.query_stats.get(name)) is None:
+            stats = self.query_stats[name] = LatencyStats(self.samples)
+        stats.record(seconds, failed)
+
+    @asynccontextmanager
+    async def acquire(self, *, timeout=None):
+        """Acquire a connection from the pool, recording how long it was waited for"""
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self.pool.acquire(timeout=timeout or self.acquire_timeout)
+
+        # Timing out means every connection was in use for too long
+        except Exception:
+            self.acquire_stats.record(time.perf_counter() - start, failed=True)
+            raise
+
+        finally:
+            self.waiting -= 1
+
+        self.acquire_stats.record(time.perf_counter() - start)
+        self.in_use += 1
+        try:
+            yield InstrumentedConnection(conn, self)
+        finally:
+            self.in_use -= 1
+            await self.pool.release(conn)
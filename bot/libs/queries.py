@@ -0,0 +1,128 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Every statement run on a hot path (events, cache misses, starboard reactions and startup)
+# The text of each one never changes, so asyncpg prepares it once per connection and reuses it from its
+# Statement cache afterwards. Only the columns that are used are selected
+
+# Only the rows of guilds on the shards handled by this process are loaded, given the shard count ($1) and ids ($2)
+# Discord puts a guild on shard (guild_id >> 22) % shard_count, >> has to be bracketed as it binds looser than %
+SHARD_FILTER = "(guild_id >> 22) % $1 = ANY($2::int[])"
+
+# --------------------------------------------!Startup!-----------------------------------------------------------------
+
+LOAD_GUILDS = f"""SELECT guild_id, prefix, modlogs, roles_persist FROM guilds WHERE {SHARD_FILTER}"""
+
+LOAD_MODMAIL = f"""SELECT guild_id, modmail_channel_id, message_id, modmail_logging_channel_id FROM moderatormail
+                   WHERE {SHARD_FILTER}"""
+
+LOAD_STARBOARDS = f"""SELECT guild_id, channel_id, min_stars FROM starboard WHERE {SHARD_FILTER}"""
+
+# The most recent $4 messages sent since $3, oldest first
+LOAD_STARBOARD_MESSAGES = f"""SELECT * FROM (SELECT root_message_id, guild_id, star_message_id, stars
+                                             FROM starboard_messages WHERE {SHARD_FILTER} AND root_message_id >= $3
+                                             ORDER BY root_message_id DESC LIMIT $4) AS recent
+                              ORDER BY root_message_id"""
+
+# --------------------------------------------!Guilds!------------------------------------------------------------------
+
+SELECT_GUILD = """SELECT prefix, modlogs, roles_persist FROM guilds WHERE guild_id = $1"""
+
+SELECT_MODMAIL = """SELECT modmail_channel_id, message_id, modmail_logging_channel_id FROM moderatormail
+                    WHERE guild_id = $1"""
+
+SELECT_STARBOARD = """SELECT channel_id, min_stars FROM starboard WHERE guild_id = $1"""
+
+NOTIFY_CACHE = """SELECT pg_notify($1, $2)"""
+
+# --------------------------------------------!Members!-----------------------------------------------------------------
+
+SELECT_MEMBER = """SELECT married, married_date, muted_roles, roles FROM members
+                   WHERE member_id = $1 AND guild_id = $2"""
+
+SELECT_MEMBERS = """SELECT member_id, married, married_date, muted_roles, roles FROM members
+                    WHERE guild_id = $1 AND member_id = ANY($2::bigint[])"""
+
+# The no-op update makes the row come back even when it already exists
+CREATE_MEMBER = """INSERT INTO members (guild_id, member_id) VALUES ($1, $2)
+                   ON CONFLICT (guild_id, member_id) DO UPDATE SET guild_id = EXCLUDED.guild_id
+                   RETURNING married, married_date, muted_roles, roles"""
+
+MEMBERS_EXIST = """SELECT EXISTS (SELECT 1 FROM members WHERE guild_id = $1)"""
+
+SELECT_EXISTING_MEMBER_IDS = """SELECT member_id FROM members WHERE guild_id = $1 AND member_id = ANY($2::bigint[])"""
+
+SELECT_GUILD_MEMBER_IDS = """SELECT member_id, has_left FROM members WHERE guild_id = $1"""
+
+MARK_MEMBERS_LEFT = """UPDATE members SET has_left = 1, left_at = $3
+                       WHERE guild_id = $1 AND member_id = ANY($2::bigint[])"""
+
+# Members that left and join again are members again, with the roles they had when they left returned and cleared
+# Works for many members of many guilds at once, returning the roles each had when they left (or NULL)
+# The CTEs read the rows as they were before the insert/update, as every part of the statement sees the same snapshot
+# Each (guild_id, member_id) can only be given once, as a row can't be inserted/updated twice within one statement
+JOIN_MEMBERS = """WITH data AS (SELECT * FROM UNNEST($1::bigint[], $2::bigint[]) AS data(guild_id, member_id)),
+                  previous AS (SELECT members.guild_id, members.member_id, members.roles
+                               FROM members JOIN data USING (guild_id, member_id)),
+                  joined AS (INSERT INTO members (guild_id, member_id) SELECT guild_id, member_id FROM data
+                             ON CONFLICT (guild_id, member_id) DO UPDATE SET left_at = NULL, has_left = 0, roles = NULL
+                             RETURNING guild_id, member_id)
+                  SELECT joined.guild_id, joined.member_id, previous.roles
+                  FROM joined LEFT JOIN previous USING (guild_id, member_id)"""
+
+# The roles of many members of many guilds are stored when they leave
+LEAVE_MEMBERS = """UPDATE members SET roles = data.roles, left_at = data.left_at, has_left = 1
+                   FROM UNNEST($1::bigint[], $2::bigint[], $3::text[], $4::timestamp[])
+                   AS data(guild_id, member_id, roles, left_at)
+                   WHERE members.guild_id = data.guild_id AND members.member_id = data.member_id"""
+
+STORE_MUTED_ROLES = """UPDATE members SET muted_roles = data.muted_roles
+                       FROM UNNEST($1::bigint[], $2::text[]) AS data(member_id, muted_roles)
+                       WHERE members.guild_id = $3 AND members.member_id = data.member_id"""
+
+CLEAR_MUTED_ROLES = """UPDATE members SET muted_roles = NULL WHERE guild_id = $1 AND member_id = ANY($2::bigint[])"""
+
+# --------------------------------------------!Starboard Messages!------------------------------------------------------
+
+SELECT_STARBOARD_MESSAGE = """SELECT star_message_id, stars FROM starboard_messages
+                              WHERE root_message_id = $1 AND guild_id = $2"""
+
+INSERT_STARBOARD_MESSAGE = """INSERT INTO starboard_messages (root_message_id, guild_id, star_message_id)
+                              VALUES ($1, $2, $3)"""
+
+UPDATE_STARBOARD_MESSAGE_STARS = """UPDATE starboard_messages SET stars = $1
+                                    WHERE root_message_id = $2 AND guild_id = $3"""
+
+# The message has been sent to the starboard
+UPDATE_STARBOARD_MESSAGE = """UPDATE starboard_messages SET stars = $1, star_message_id = $2
+                              WHERE root_message_id = $3 AND guild_id = $4"""
+
+# The message has been taken off the starboard
+REMOVE_STARBOARD_MESSAGE = """UPDATE starboard_messages SET stars = $1, star_message_id = NULL
+                              WHERE root_message_id = $2 AND guild_id = $3"""
+
+FLUSH_STARBOARD_MESSAGE_STARS = """UPDATE starboard_messages SET stars = data.stars
+                                   FROM UNNEST($1::bigint[], $2::bigint[], $3::int[])
+                                   AS data(root_message_id, guild_id, stars)
+                                   WHERE starboard_messages.root_message_id = data.root_message_id
+                                   AND starboard_messages.guild_id = data.guild_id"""
+
+# Name of every statement above by its text, so their latencies are recorded under the name
+NAMES = {query: name for name, query in list(globals().items())
+         if name.isupper() and name != "SHARD_FILTER" and isinstance(query, str)}
+
+# Statement used to reload the row of a guild from each of the guild tables
+SELECT_GUILD_TABLE = {"guilds": SELECT_GUILD, "moderatormail": SELECT_MODMAIL, "starboard": SELECT_STARBOARD}
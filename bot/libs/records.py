@@ -0,0 +1,72 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+# Every cache keeps one of these per guild/member/message, so they use __slots__
+# Rather than dicts to keep the memory used by each entry down
+
+
+class GuildConfig:
+    """Settings of a guild (guilds table)"""
+
+    __slots__ = ("prefix", "modlogs", "roles_persist")
+
+    def __init__(self, prefix, modlogs, roles_persist):
+        self.prefix = prefix
+        self.modlogs = modlogs
+        self.roles_persist = roles_persist
+
+
+class ModmailConfig:
+    """Modmail system of a guild (moderatormail table)"""
+
+    __slots__ = ("modmail_channel_id", "message_id", "modmail_logging_channel_id")
+
+    def __init__(self, modmail_channel_id, message_id, modmail_logging_channel_id):
+        self.modmail_channel_id = modmail_channel_id
+        self.message_id = message_id
+        self.modmail_logging_channel_id = modmail_logging_channel_id
+
+
+class StarboardConfig:
+    """Starboard of a guild (starboard table)"""
+
+    __slots__ = ("channel_id", "min_stars")
+
+    def __init__(self, channel_id, min_stars):
+        self.channel_id = channel_id
+        self.min_stars = min_stars
+
+
+class StarMessage:
+    """Message being tracked by the starboard (starboard_messages table)"""
+
+    __slots__ = ("star_message_id", "stars")
+
+    def __init__(self, star_message_id, stars):
+        self.star_message_id = star_message_id
+        self.stars = stars
+
+
+class MemberRecord:
+    """Member of a guild (members table)"""
+
+    __slots__ = ("married", "married_date", "muted_roles", "roles")
+
+    def __init__(self, married, married_date, muted_roles, roles):
+        self.married = married
+        self.married_date = married_date
+        self.muted_roles = muted_roles
+        self.roles = roles
@@ -0,0 +1,212 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import groupby
+
+from bot.libs.records import StarMessage
+
+# Snowflakes are never 0, so 0 stands for a message that isn't on the starboard (yet)
+NO_STAR_MESSAGE = 0
+
+
+class StarMessageStore:
+    """
+    Columnar store of starboard messages, can be used in place of MyCoolCache for starboard_messages_cache
+
+    The messages of each guild are kept in typed arrays sorted by root_message_id, around 20 bytes a
+    message instead of a tuple key, an OrderedDict entry and a StarMessage each. Lookups are a binary
+    search and removing a guild drops its arrays. New messages go into a small dict which is merged into
+    the arrays once it grows large enough. When the store is full, the oldest messages (by snowflake) are
+    dropped instead of the least recently used ones.
+
+    get_cache returns a copy of the message, so changes have to be stored back with store_cache.
+    """
+
+    def __init__(self, size, merge_size=4096):
+        # The maximum size of the store
+        self.MAX_SIZE = size
+        # Smallest amount of new messages that are merged into the arrays at once
+        self.MERGE_SIZE = merge_size
+
+        # guild_id: (root_message_ids, star_message_ids, stars), row i of every column is the same message
+        self.guilds = {}
+        # Amount of messages within the arrays
+        self.rows = 0
+
+        # Messages stored since the last merge, (root_message_id, guild_id): (star_message_id, stars)
+        self.delta = {}
+
+    def __contains__(self, key):
+        return key in self.delta or self.find(*key) is not None
+
+    def __len__(self):
+        return self.rows + len(self.delta)
+
+    def find(self, root_message_id, guild_id):
+        """Return the columns of the guild and the row of the message within them, or None when it isn't there"""
+
+        if (columns := self.guilds.get(guild_id)) is None:
+            return None
+
+        root_message_ids = columns[0]
+        i = bisect_left(root_message_ids, root_message_id)
+        if i < len(root_message_ids) and root_message_ids[i] == root_message_id:
+            return columns, i
+
+        return None
+
+    def get_size(self):
+        """Return size of cache and queue"""
+
+        # There's no separate queue, so both lengths are the same
+        return self.MAX_SIZE, len(self), len(self)
+
+    def get_cache(self, key):
+        """Return a copy of the message stored (or None)"""
+
+        if (row := self.delta.get(key)) is not None:
+            return StarMessage(*row)
+
+        if (found := self.find(*key)) is None:
+            return None
+
+        (_, star_message_ids, stars), i = found
+        return StarMessage(star_message_ids[i] or None, stars[i])
+
+    def change_array_size(self, input_size):
+        """Dynamically change the size of the store"""
+
+        self.MAX_SIZE = input_size
+
+        self.merge()
+        if len(self) > input_size:
+            self.evict_oldest(len(self) - input_size)
+
+    def store_cache(self, key, message):
+        """Store the message, overwriting the one stored already"""
+
+        if key in self.delta:
+            self.delta[key] = (message.star_message_id, message.stars)
+
+        # Messages that have been merged already are updated where they are
+        elif (found := self.find(*key)) is not None:
+            (_, star_message_ids, stars), i = found
+            star_message_ids[i] = message.star_message_id or NO_STAR_MESSAGE
+            stars[i] = message.stars
+
+        else:
+            self.delta[key] = (message.star_message_id, message.stars)
+
+            # Merge in proportion to the size of the arrays, so every message ends up being copied only a few times
+            if len(self.delta) >= max(self.MERGE_SIZE, self.rows // 32):
+                self.merge()
+
+    def remove(self, key):
+        """Remove a single message from the store"""
+
+        if self.delta.pop(key, None) is None and (found := self.find(*key)) is not None:
+            columns, i = found
+            for column in columns:
+                del column[i]
+            self.rows -= 1
+
+            # Guilds don't keep empty arrays around
+            if not columns[0]:
+                del self.guilds[key[1]]
+
+    def remove_many(self, in_guild_id):
+        # This method is to be used for when the bot has left a guild
+        # The guild's messages have their own arrays, so they're dropped all at once
+        self.delta = {key: row for key, row in self.delta.items() if key[1] != in_guild_id}
+
+        if (columns := self.guilds.pop(in_guild_id, None)) is not None:
+            self.rows -= len(columns[0])
+
+    def merge(self):
+        """Move the new messages into the arrays"""
+
+        if not self.delta:
+            return
+
+        rows = sorted(self.delta.items(), key=lambda item: (item[0][1], item[0][0]))
+        self.rows += len(rows)
+        self.delta = {}
+
+        for guild_id, group in groupby(rows, key=lambda item: item[0][1]):
+            group = list(group)
+            new = (array("Q", [root_message_id for (root_message_id, _), _ in group]),
+                   array("Q", [star_message_id or NO_STAR_MESSAGE for _, (star_message_id, _) in group]),
+                   array("i", [stars for _, (_, stars) in group]))
+
+            if (old := self.guilds.get(guild_id)) is None:
+                self.guilds[guild_id] = new
+
+            # New messages are usually newer than every message stored, so they only have to be appended
+            elif old[0][-1] < new[0][0]:
+                for old_column, new_column in zip(old, new):
+                    old_column.extend(new_column)
+
+            else:
+                self.guilds[guild_id] = self.merge_columns(old, new)
+
+        # Make some room as well, so a full store isn't trimmed on every merge
+        if len(self) > self.MAX_SIZE:
+            self.evict_oldest(len(self) - self.MAX_SIZE + self.MAX_SIZE // 10)
+
+    @staticmethod
+    def merge_columns(old, new):
+        """Return the rows of both sets of columns, sorted by root_message_id"""
+
+        merged = (array("Q"), array("Q"), array("i"))
+
+        # Copy the existing rows up to where each new message goes, then the new message itself
+        start = 0
+        for row, root_message_id in enumerate(new[0]):
+            at = bisect_left(old[0], root_message_id, start)
+
+            for merged_column, old_column, new_column in zip(merged, old, new):
+                merged_column.extend(old_column[start:at])
+                merged_column.append(new_column[row])
+            start = at
+
+        for merged_column, old_column in zip(merged, old):
+            merged_column.extend(old_column[start:])
+
+        return merged
+
+    def evict_oldest(self, amount):
+        """Remove roughly the given amount of the oldest messages from the arrays"""
+
+        if amount >= self.rows:
+            self.guilds = {}
+            self.rows = 0
+            return
+
+        # Estimate the snowflake that many messages are older than from a sample of every guild's messages
+        step = max(1, self.rows // 10000)
+        sample = sorted(root_message_id for columns in self.guilds.values() for root_message_id in columns[0][::step])
+        cutoff = sample[min(amount * len(sample) // self.rows, len(sample) - 1)]
+
+        # The oldest messages of every guild are at the start of its arrays
+        for guild_id, columns in list(self.guilds.items()):
+            if (keep := bisect_right(columns[0], cutoff)) == len(columns[0]):
+                del self.guilds[guild_id]
+            else:
+                for column in columns:
+                    del column[:keep]
+            self.rows -= keep
@@ -23,9 +23,6 @@ class Events(Cog):
         Store prefix/modlogs in the cache
         """
 
-        # Store every single record into an array
-        records = [(member.id, None, None, guild.id, None, None, None, 0) for member in guild.members]
-
         # Setup up pool connection
         pool = self.bot.db
         async with pool.acquire() as conn:
@@ -43,18 +40,21 @@ class Events(Cog):
             else:
                 print(rowcount, f"Record(s) inserted successfully into {guild}")
                 self.bot.store_cache(guild.id, modlogs=None, prefix=".", roles_persist=0)
+                await self.bot.notify_cache(conn, "guilds", guild.id)
 
-            # Query to insert all the member details to members table
+            # Copy all the members into the members table, a chunk at a time
             try:
-                rowcount = await conn.copy_records_to_table("members", records=records)
+                rowcount = await self.bot.copy_members(conn, guild, (member.id for member in guild.members))
 
             # Catch errors
             except asyncpg.PostgresError as e:
                 print(f"PostGres Error: Members Could Not Be Inserted Into Members Table For Guild {guild.id}", e)
 
-            # Store in cache
+            # Members of the guild now have records
             else:
                 print(rowcount, f"Record(s) inserted successfully into Members from {guild}")
+                self.bot.member_negative_cache.remove_many(guild.id)
+                await self.bot.notify_cache(conn, "members", guild.id)
 
     @Cog.listener()
     async def on_guild_remove(self, guild):
@@ -80,6 +80,7 @@ class Events(Cog):
             else:
                 print(rowcount, f"Record deleted successfully from Guild {guild}")
                 self.bot.del_cache(guild.id)
+                await self.bot.notify_cache(conn, "guilds", guild.id)
 
             # Delete all records of members from that guild
             try:
@@ -95,6 +96,7 @@ class Events(Cog):
                 print(rowcount, f"Record(s) deleted successfully from Members from {guild}")
                 # Remove any/all members stored in cache from that guild
                 self.bot.member_cache.remove_many(guild.id)
+                await self.bot.notify_cache(conn, "members", guild.id)
 
             # Delete any starboard information upon leaving the guild
             try:
@@ -113,6 +115,7 @@ class Events(Cog):
                 if self.bot.get_starboard_channel(guild.id):
                     self.bot.delete_starboard(guild.id)
                     self.bot.delete_starboard_messages(guild.id)
+                await self.bot.notify_cache(conn, "starboard", guild.id)
 
     @Cog.listener()
     async def on_member_join(self, member):
@@ -128,79 +131,50 @@ class Events(Cog):
         guild = member.guild
         role_persist = self.bot.get_roles_persist(guild.id)
 
-        # Setup pool connection
-        pool = self.bot.db
-        async with pool.acquire() as conn:
-
-            # Define the insert statement that will insert the user's information
-            # On conflict, set the left values to null
-            try:
-
-                insert = """INSERT INTO members (guild_id, member_id) VALUES ($1, $2)
-                ON CONFLICT (guild_id, member_id) DO UPDATE SET left_at = NULL, has_left = 0"""
-                rowcount = await conn.execute(insert, member.guild.id, member.id)
-
-            # Catch errors
-            except asyncpg.PostgresError as e:
-                print(
-                    f"PostGres Error: {member} | {member.id} was not be able to be added to {member.guild} | {member.guild.id}",
-                    e)
-
-            # Print success
-            else:
-                print(rowcount, f"{member} Joined {member.guild}, Record Inserted Into Members")
-                print(rowcount, f"Roles Cleared For {member} in {member.guild}")
-
-            # Get the roles of the user from the database
-            try:
-                select_query = """SELECT * FROM members WHERE guild_id = $1 AND member_id = $2"""
-
-                user_joined = await conn.fetchrow(select_query, member.guild.id, member.id)
-                role_ids = user_joined["roles"]
-
-            # Catch errors
-            except asyncpg.PostgresError as e:
-                print(f"PostGres Error: {member} | {member.id} Record Not Found", e)
-
-            # Give roles back to the user if role persist is enabled
-            else:
-                if role_persist == 1:
-                    # Get Enso Chan
-                    bot = guild.get_member(self.bot.user.id)
-                    # Set flag for what value role_ids is
-                    flag = role_ids
-
-                    # Check permissions of Enso
-                    if bot.guild_permissions.manage_roles and flag:
-                        # Get all the roles of the user before they were muted from the database
-                        roles = [member.guild.get_role(int(id_)) for id_ in role_ids.split(", ") if len(id_)]
-
-                        # Give the member their roles back
-                        await member.edit(roles=roles)
-                        print(f"{member} Had Their Roles Given Back In {member.guild}")
-
-                    # Don't give roles if user has no roles to be given
-                    elif bot.guild_permissions.manage_roles and not flag:
-                        print(f"Member {member} | {member.id} Had No Roles To Be Given")
-
-                    # No permissions to give roles in the server
-                    else:
-                        print(
-                            f"Insufficient Permissions to Add Roles to {member} | {member.id} in {member.guild} | {member.guild.id}")
-
-            # Reset the roles entry for the database
-            try:
-                update_query = """UPDATE members SET roles = NULL WHERE guild_id = $1 AND member_id = $2"""
-                rowcount = await conn.execute(update_query, member.guild.id, member.id)
-
-            # Catch errors
-            except asyncpg.PostgresError as e:
-                print(f"PostGres Error: Clearing Member {member.id} Roles in Guild {member.guild.id}", e)
-
-            # Print success
-            # Update cache
+        # Insert the user's information, on conflict set the left values to null
+        # The roles stored when the member left are returned and cleared, written along with every other join/leave
+        try:
+            role_ids = await self.bot.member_queue.join(member.guild.id, member.id)
+
+        # Catch errors, the queue passes on anything that stopped the write (e.g a timed out acquire)
+        except Exception as e:
+            print(
+                f"Error: {member} | {member.id} was not be able to be added to {member.guild} | {member.guild.id}",
+                e)
+            return
+
+        # Print success
+        # The member has a record now, without any stored roles
+        else:
+            print(f"{member} Joined {member.guild}, Record Inserted Into Members And Roles Cleared")
+            self.bot.member_negative_cache.discard((member.id, member.guild.id))
+            if (result := self.bot.member_cache.get_cache((member.id, member.guild.id))) is not None:
+                result.roles = None
+
+        # Give roles back to the user if role persist is enabled
+        if role_persist == 1:
+            # Get Enso Chan
+            bot = guild.get_member(self.bot.user.id)
+            # Set flag for what value role_ids is
+            flag = role_ids
+
+            # Check permissions of Enso
+            if bot.guild_permissions.manage_roles and flag:
+                # Get all the roles of the user before they were muted from the database
+                roles = [member.guild.get_role(int(id_)) for id_ in role_ids.split(", ") if len(id_)]
+
+                # Give the member their roles back
+                await member.edit(roles=roles)
+                print(f"{member} Had Their Roles Given Back In {member.guild}")
+
+            # Don't give roles if user has no roles to be given
+            elif bot.guild_permissions.manage_roles and not flag:
+                print(f"Member {member} | {member.id} Had No Roles To Be Given")
+
+            # No permissions to give roles in the server
             else:
-                print(rowcount, f"Roles Cleared For {member} in {member.guild}")
+                print(
+                    f"Insufficient Permissions to Add Roles to {member} | {member.id} in {member.guild} | {member.guild.id}")
 
     @Cog.listener()
     async def on_member_remove(self, member):
@@ -215,23 +189,17 @@ class Events(Cog):
         # Store member roles within a string to insert into database
         role_ids = ", ".join([str(r.id) for r in member.roles if not r.managed])
 
-        # Setup pool connection
-        pool = self.bot.db
-        async with pool.acquire() as conn:
+        # Store member roles within the database, written along with every other join/leave
+        try:
+            await self.bot.member_queue.leave(member.guild.id, member.id, role_ids, left_at)
 
-            # Store member roles within the database
-            try:
-                update = """UPDATE members SET roles = $1, left_at = $2, has_left = 1
-                                  WHERE guild_id = $3 AND member_id = $4"""
-                rowcount = await conn.execute(update, role_ids, left_at, member.guild.id, member.id)
+        # Catch Error, the queue passes on anything that stopped the write (e.g a timed out acquire)
+        except Exception as e:
+            print(f"Error: Roles Could Not Be Added To {member} When Leaving {member.guild.id}", e)
 
-            # Catch Error
-            except asyncpg.PostgresError as e:
-                print(f"PostGres Error: Roles Could Not Be Added To {member} When Leaving {member.guild.id}", e)
-
-            # Print success
-            else:
-                print(rowcount, f"{member} Left {member.guild.name}, Roles stored into Members")
+        # Print success
+        else:
+            print(f"{member} Left {member.guild.name}, Roles stored into Members")
 
     @Cog.listener()
     async def on_guild_channel_delete(self, channel):
@@ -244,8 +212,8 @@ class Events(Cog):
 
         # Get the modmail record - (normal and logging channels)
         modmail_record = self.bot.get_modmail(channel.guild.id)
-        modmail_channel = modmail_record.get("modmail_channel_id") if modmail_record else None
-        modmail_logging_channel = modmail_record.get("modmail_logging_channel_id") if modmail_record else None
+        modmail_channel = modmail_record.modmail_channel_id if modmail_record else None
+        modmail_logging_channel = modmail_record.modmail_logging_channel_id if modmail_record else None
 
         # Get pool
         pool = self.bot.db
@@ -267,6 +235,7 @@ class Events(Cog):
                 # Delete channel from cache
                 else:
                     self.bot.remove_modlog_channel(channel.guild.id)
+                    await self.bot.notify_cache(conn, "guilds", channel.guild.id)
 
         # Delete all of the starboard information when the channel is deleted from the guild
         if channel.id == starboard:
@@ -289,6 +258,7 @@ class Events(Cog):
                     print(rowcount, f"Starboard deleted successfully from Guild {channel.guild}")
                     self.bot.delete_starboard(channel.guild.id)
                     self.bot.delete_starboard_messages(channel.guild.id)
+                    await self.bot.notify_cache(conn, "starboard", channel.guild.id)
 
         # If modmail channels are deleted, delete the entire system
         if channel.id == modmail_channel or channel.id == modmail_logging_channel:
@@ -307,6 +277,7 @@ class Events(Cog):
                 # Delete from cache
                 else:
                     self.bot.delete_modmail(channel.guild.id)
+                    await self.bot.notify_cache(conn, "moderatormail", channel.guild.id)
 
 
 def setup(bot):
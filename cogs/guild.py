@@ -22,6 +22,7 @@ from discord import Embed, TextChannel
 from discord.ext.commands import has_permissions, Cog, group, bot_has_permissions, BadArgument, MissingRequiredArgument, \
     command, MissingPermissions
 
+from bot.libs import queries
 from cogs.libs.modmail import Modmail
 from cogs.libs.starboard import Starboard
 
@@ -35,8 +36,7 @@ async def get_starboard_from_db(self, ctx, action):
 
         # Get the row of the guild from the starboard table
         try:
-            select_query = """SELECT * FROM starboard WHERE guild_id = $1"""
-            result = await conn.fetchrow(select_query, ctx.guild.id)
+            result = await conn.fetchrow(queries.SELECT_STARBOARD, ctx.guild.id)
 
         # Catch errors
         except asyncpg.PostgresError as e:
@@ -65,10 +65,9 @@ async def get_modlogs_from_db(self, ctx, action):
     pool = self.bot.db
     async with pool.acquire() as conn:
 
-        # Get the entire row of the guild from the guilds table
+        # Get the row of the guild from the guilds table
         try:
-            select_query = """SELECT * FROM guilds WHERE guild_id = $1"""
-            result = await conn.fetchrow(select_query, ctx.guild.id)
+            result = await conn.fetchrow(queries.SELECT_GUILD, ctx.guild.id)
 
         # Catch errors
         except asyncpg.PostgresError as e:
@@ -97,10 +96,9 @@ async def get_modmail_from_db(self, ctx, action):
     pool = self.bot.db
     async with pool.acquire() as conn:
 
-        # Get the entire row of the guild from the guilds table
+        # Get the row of the guild from the guilds table
         try:
-            select_query = """SELECT * FROM moderatormail WHERE guild_id = $1"""
-            result = await conn.fetchrow(select_query, ctx.guild.id)
+            result = await conn.fetchrow(queries.SELECT_MODMAIL, ctx.guild.id)
 
         # Catch errors
         except asyncpg.PostgresError as e:
@@ -157,8 +155,8 @@ class Guild(Cog):
 
         # Get status of modmail
         if modmail := self.bot.get_modmail(ctx.guild.id):
-            modmail_channel = ctx.guild.get_channel(modmail["modmail_channel_id"])
-            modmail_logging = ctx.guild.get_channel(modmail["modmail_logging_channel_id"])
+            modmail_channel = ctx.guild.get_channel(modmail.modmail_channel_id)
+            modmail_logging = ctx.guild.get_channel(modmail.modmail_logging_channel_id)
 
             desc += f"**{self.bot.tick} Modmail | Channel:  {modmail_channel.mention} | Logging: {modmail_logging.mention}**\n"
         else:
@@ -242,6 +240,7 @@ class Guild(Cog):
 
                     # Update cache
                     self.bot.update_starboard_min_stars(ctx.guild.id, stars)
+                    await self.bot.notify_cache(conn, "starboard", ctx.guild.id)
 
         elif stars <= 0:
             await self.bot.generate_embed(ctx, desc="Minimum Stars Must Be Over or Equal to 1!")
@@ -276,6 +275,7 @@ class Guild(Cog):
 
                     # Store into cache
                     self.bot.cache_store_starboard(ctx.guild.id, starboard_channel.id, 1)
+                    await self.bot.notify_cache(conn, "starboard", ctx.guild.id)
 
     @starboard.command(name="update", usage="`<channel>`")
     @bot_has_permissions(embed_links=True)
@@ -307,6 +307,7 @@ class Guild(Cog):
 
                     # Update cache
                     self.bot.update_starboard_channel(ctx.guild.id, starboard_channel.id)
+                    await self.bot.notify_cache(conn, "starboard", ctx.guild.id)
 
     @starboard.command(name="delete")
     @bot_has_permissions(embed_links=True)
@@ -335,6 +336,7 @@ class Guild(Cog):
 
                     # Delete from cache
                     self.bot.delete_starboard(ctx.guild.id)
+                    await self.bot.notify_cache(conn, "starboard", ctx.guild.id)
 
     @group(name="modlogs", case_insensitive=True, usage="`<setup|update|delete>`")
     @has_permissions(manage_guild=True)
@@ -387,6 +389,7 @@ class Guild(Cog):
                     await self.bot.generate_embed(ctx, desc=text)
 
                     self.bot.remove_modlog_channel(ctx.guild.id)
+                    await self.bot.notify_cache(conn, "guilds", ctx.guild.id)
 
     @group(name="modmail", case_insensitive=True, usage="`<setup|update|delete>`")
     @bot_has_permissions(manage_channels=True, embed_links=True, add_reactions=True, manage_messages=True,
@@ -446,6 +449,7 @@ class Guild(Cog):
 
                     # Store into cache
                     self.bot.cache_store_modmail(ctx.guild.id, modmail.id, modmail_message.id, modmail_logging.id)
+                    await self.bot.notify_cache(conn, "moderatormail", ctx.guild.id)
 
     @mod_mail.command(name="update")
     async def mmupdate(self, ctx, modmail_logging_channel: TextChannel):
@@ -474,6 +478,7 @@ class Guild(Cog):
                     await self.bot.generate_embed(ctx, desc=text)
                     # Update cache
                     self.bot.update_modmail(ctx.guild.id, modmail_logging_channel.id)
+                    await self.bot.notify_cache(conn, "moderatormail", ctx.guild.id)
 
     @mod_mail.command(name="delete")
     async def mmdelete(self, ctx):
@@ -502,6 +507,7 @@ class Guild(Cog):
 
                     # Delete from cache
                     self.bot.delete_modmail(ctx.guild.id)
+                    await self.bot.notify_cache(conn, "moderatormail", ctx.guild.id)
 
     @Cog.listener()
     async def on_raw_reaction_add(self, payload):
@@ -516,6 +522,20 @@ class Guild(Cog):
 
         await self.starboard.send_starboard_and_update_db(payload, action="removed")
 
+    @Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        """Forgetting the snapshot of a starred message when it's edited"""
+
+        if guild_id := payload.data.get("guild_id"):
+            self.bot.root_message_cache.remove((payload.message_id, int(guild_id)))
+
+    @Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        """Forgetting the snapshot of a starred message when it's deleted"""
+
+        if payload.guild_id:
+            self.bot.root_message_cache.remove((payload.message_id, payload.guild_id))
+
     @mlsetup.error
     @mlupdate.error
     @mmsetup.error
@@ -373,6 +373,16 @@ class Info(Cog):
 
         # Grabbing total number of channels across all guilds in which the bot is present in
         channels = map(lambda m: len(m.channels), self.bot.guilds)
+        discord_stats = {"guilds": len(self.bot.guilds), "channels": sum(list(channels)),
+                         "emojis": len(self.bot.emojis), "users": len(self.bot.users)}
+        memory = f"{mem_usage:,.2f} / {mem_total:,.2f} MiB ({mem_of_total:.2f}%)"
+
+        # When running as one of the launcher's clusters, show the numbers of the whole bot
+        if self.bot.cluster and self.bot.cluster.clusters:
+            totals = self.bot.cluster.totals()
+            discord_stats = {name: totals.get(name, 0) for name in discord_stats}
+            memory = f"{totals.get('memory', 0):,.2f} MiB Across {len(self.bot.cluster.clusters)} Cluster(s)" \
+                     f"\nThis Cluster: {memory}"
 
         # Setting up fields
         fields = [
@@ -391,15 +401,15 @@ class Info(Cog):
             ("❗ Current Prefix", ctx.prefix, True),
 
             ("Discord Stats",
-             f"Guilds: {len(self.bot.guilds)}"
-             f"\nChannels: {sum(list(channels))}"
-             f"\nEmojis: {len(self.bot.emojis)}"
+             f"Guilds: {discord_stats['guilds']}"
+             f"\nChannels: {discord_stats['channels']}"
+             f"\nEmojis: {discord_stats['emojis']}"
              f"\nCommands: {len(self.bot.commands)}"
-             f"\nUsers: {len(self.bot.users):,}", True),
+             f"\nUsers: {discord_stats['users']:,}", True),
 
-            ("Line Count", self.bot.line_count, True),
+            ("Line Count", await self.bot.get_line_count(), True),
             ("Uptime", frmt_uptime, False),
-            ("Memory Usage", f"{mem_usage:,.2f} / {mem_total:,.2f} MiB ({mem_of_total:.2f}%)", False)]
+            ("Memory Usage", memory, False)]
 
         # Add fields to the embed
         for name, value, inline in fields:
@@ -56,9 +56,6 @@ class Interactive(Cog):
     async def kiss(self, ctx, member: Member):
         """Kiss your partner"""
 
-        # Get the guild
-        guild = ctx.guild
-
         # Error handling to make sure that the user can kiss themselves
         if member.id == ctx.author.id:
             kiss = False
@@ -68,9 +65,10 @@ class Interactive(Cog):
             title = f":kissing_heart: :kissing_heart: | **{ctx.author.display_name}** kissed **{member.display_name}**"
 
         # Get author record from cache/database
-        result = await self.bot.check_cache(ctx.author.id, guild.id)
+        if (result := await self.bot.get_member_record(ctx, ctx.author)) is None:
+            return
 
-        married_user = result["married"]
+        married_user = result.married
         if married_user is None and kiss:
             await self.bot.generate_embed(ctx,
                                           desc="Σ(‘◉⌓◉’) You need to be married in order to use this command! Baka!")
@@ -99,9 +97,6 @@ class Interactive(Cog):
     async def cuddle(self, ctx, member: Member):
         """Cuddle your partner"""
 
-        # Get the guild
-        guild = ctx.guild
-
         # Error handling to make sure that the user can cuddle themselves
         if member.id == ctx.author.id:
             cuddle = False
@@ -111,9 +106,10 @@ class Interactive(Cog):
             title = f":blush: :blush: | **{ctx.author.display_name}** cuddled **{member.display_name}**"
 
         # Get author record from cache/database
-        result = await self.bot.check_cache(ctx.author.id, guild.id)
+        if (result := await self.bot.get_member_record(ctx, ctx.author)) is None:
+            return
 
-        married_user = result["married"]
+        married_user = result.married
         if married_user is None and cuddle:
             await self.bot.generate_embed(ctx,
                                           desc="Σ(‘◉⌓◉’) You need to be married in order to use this command! Baka!")
@@ -174,9 +174,9 @@ class Modmail:
         # Get the modmail information from cache
         modmail = self.bot.get_modmail(payload.guild_id)
         if modmail:
-            channel_id = modmail["modmail_channel_id"]
-            message_id = modmail["message_id"]
-            modmail_channel_id = modmail["modmail_logging_channel_id"]
+            channel_id = modmail.modmail_channel_id
+            message_id = modmail.message_id
+            modmail_channel_id = modmail.modmail_logging_channel_id
         else:
             return
 
@@ -14,22 +14,135 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
+import asyncio
 import datetime
 
 import asyncpg
-from discord import Embed
+from discord import Embed, NotFound, HTTPException
+from discord.utils import find
+
+from bot.libs import queries
+
+from bot.libs.cache import MyCoolCache
+
+# How long (in seconds) to wait for a burst of reactions to settle before editing the starboard message
+EDIT_DELAY = 2.0
+
+
+class RootMessage:
+    """Snapshot of everything the starboard embed needs from the original message"""
+
+    __slots__ = ("id", "content", "author_id", "author_bot", "author", "author_colour", "avatar_url",
+                 "channel_mention", "jump_url", "attachment")
+
+    def __init__(self, message):
+        self.id = message.id
+        self.content = message.content
+        self.author_id = message.author.id
+        self.author_bot = message.author.bot
+        self.author = str(message.author)
+        self.author_colour = message.author.colour
+        self.avatar_url = str(message.author.avatar_url)
+        self.channel_mention = message.channel.mention
+        self.jump_url = message.jump_url
+
+        # Only the first attachment is shown on the starboard
+        if message.attachments:
+            file = message.attachments[0]
+            self.attachment = (file.filename, file.url, file.is_spoiler())
+        else:
+            self.attachment = None
 
 
 class Starboard:
     def __init__(self, bot):
         self.bot = bot
+        # Messages sent to the starboard, so they don't have to be fetched to be edited/deleted
+        self.star_messages = MyCoolCache(500)
+        # The latest embed waiting to be edited into each starboard message and the task that will edit it
+        self.pending_edits = {}
+        self.edit_tasks = {}
+
+    async def get_star_message(self, channel, msg_id, guild_id):
+        """Get the starboard message from cache or from discord"""
+
+        if (star_message := self.star_messages.get_cache((msg_id, guild_id))) is None:
+            star_message = await channel.fetch_message(msg_id)
+            self.star_messages.store_cache((msg_id, guild_id), star_message)
+
+        return star_message
+
+    async def send_star_message(self, channel, guild_id, embed):
+        """Send the message to the starboard and keep it in cache"""
+
+        star_message = await channel.send(embed=embed)
+        self.star_messages.store_cache((star_message.id, guild_id), star_message)
+
+        return star_message
+
+    async def get_root_message(self, payload):
+        """Get the snapshot of the starred message from cache, the gateway message cache or discord"""
+
+        key = (payload.message_id, payload.guild_id)
+        stats = self.bot.root_message_stats
+
+        if (snapshot := self.bot.root_message_cache.get_cache(key)) is not None:
+            stats.hits += 1
+            return snapshot
+
+        # Recent messages are most likely to be starred, so search from the newest
+        if message := find(lambda m: m.id == payload.message_id, reversed(self.bot.cached_messages)):
+            stats.hits += 1
+        else:
+            stats.misses += 1
+            message = await self.bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
+
+        snapshot = RootMessage(message)
+        self.bot.root_message_cache.store_cache(key, snapshot)
+
+        return snapshot
+
+    def schedule_edit(self, channel, msg_id, guild_id, embed):
+        """Edit the starboard message once the reactions have settled, with only the latest embed"""
+
+        self.pending_edits[msg_id, guild_id] = embed
+        if (msg_id, guild_id) not in self.edit_tasks:
+            self.edit_tasks[msg_id, guild_id] = self.bot.loop.create_task(self.edit_later(channel, msg_id, guild_id))
+
+    def cancel_edit(self, msg_id, guild_id):
+        """Cancel the edit waiting for the starboard message"""
+
+        if task := self.edit_tasks.pop((msg_id, guild_id), None):
+            task.cancel()
+        self.pending_edits.pop((msg_id, guild_id), None)
+
+    async def edit_later(self, channel, msg_id, guild_id):
+        """Wait for the reactions to settle and then edit the starboard message"""
+
+        await asyncio.sleep(EDIT_DELAY)
+
+        # Reactions from now on will schedule another edit
+        del self.edit_tasks[msg_id, guild_id]
+        embed = self.pending_edits.pop((msg_id, guild_id))
+
+        try:
+            star_message = await self.get_star_message(channel, msg_id, guild_id)
+            await star_message.edit(embed=embed)
+
+        # The starboard message was deleted by someone else
+        except NotFound:
+            self.star_messages.remove((msg_id, guild_id))
+
+        # Such as the permissions in the starboard channel being taken away, nobody is awaiting this task
+        except HTTPException as e:
+            print(f"Discord Error: Starboard Message {msg_id} Could Not Be Edited In Guild {guild_id}", e)
 
     async def send_starboard_message(self, payload, new_stars, msg_id, channel, message, embed):
         """Send the message to the starboard for the first time"""
 
         # When the message stars is larger than the minimum, send to the starboard and store in database/cache
         if new_stars >= self.bot.get_starboard_min_stars(payload.guild_id) and not msg_id:
-            star_message = await channel.send(embed=embed)
+            star_message = await self.send_star_message(channel, payload.guild_id, embed)
 
             # Only insert the record into database when it doesn't exist in cache
             if not self.bot.check_root_message_id(message.id, payload.guild_id):
@@ -39,9 +152,7 @@ class Starboard:
 
                     # Insert the starboard message in the database
                     try:
-                        insert = """INSERT INTO starboard_messages (root_message_id, guild_id, star_message_id)
-                                              VALUES ($1, $2, $3)"""
-                        await conn.execute(insert, message.id, payload.guild_id, star_message.id)
+                        await conn.execute(queries.INSERT_STARBOARD_MESSAGE, message.id, payload.guild_id, star_message.id)
 
                     # Catch errors
                     except asyncpg.PostgresError as e:
@@ -59,8 +170,7 @@ class Starboard:
 
                     # Update the stars that the message has in the database and then store the message id's
                     try:
-                        update = """UPDATE starboard_messages SET stars = $1, star_message_id = $2 WHERE root_message_id = $3 AND guild_id = $4"""
-                        await conn.execute(update, new_stars, star_message.id, message.id, payload.guild_id)
+                        await conn.execute(queries.UPDATE_STARBOARD_MESSAGE, new_stars, star_message.id, message.id, payload.guild_id)
 
                     # Catch errors
                     except asyncpg.PostgresError as e:
@@ -83,8 +193,7 @@ class Starboard:
 
                     # Insert the starboard message in the database
                     try:
-                        insert = """INSERT INTO starboard_messages (root_message_id, guild_id) VALUES ($1, $2)"""
-                        await conn.execute(insert, message.id, payload.guild_id)
+                        await conn.execute(queries.INSERT_STARBOARD_MESSAGE, message.id, payload.guild_id, None)
 
                     # Catch errors
                     except asyncpg.PostgresError as e:
@@ -98,24 +207,7 @@ class Starboard:
 
             # When the message is already in the database/cache, update the amount of reactions
             else:
-                # Setup up pool connection
-                pool = self.bot.db
-                async with pool.acquire() as conn:
-
-                    # Update the stars that the message has in the database and then store the message id's
-                    try:
-                        update = """UPDATE starboard_messages SET stars = $1 WHERE root_message_id = $2 AND guild_id = $3"""
-                        await conn.execute(update, new_stars, message.id, payload.guild_id)
-
-                    # Catch errors
-                    except asyncpg.PostgresError as e:
-                        print(
-                            f"PostGres Error: Starboard_Message Record Could Not Be Updated For Guild {payload.guild_id}",
-                            e)
-
-                    # Update cache
-                    else:
-                        self.bot.update_starboard_message_stars(message.id, payload.guild_id, new_stars)
+                await self.bot.save_starboard_message_stars(message.id, payload.guild_id, new_stars)
 
     async def edit_starboard_message(self, payload, new_stars, msg_id, channel, message, embed):
         """Edit the message which is already on the starboard"""
@@ -124,7 +216,7 @@ class Starboard:
 
         # When the message has finally reached the minimum amount of stars, send the message to the starboard
         if new_stars >= min_stars and not msg_id:
-            star_message = await channel.send(embed=embed)
+            star_message = await self.send_star_message(channel, payload.guild_id, embed)
 
             # Setup up pool connection
             pool = self.bot.db
@@ -132,9 +224,7 @@ class Starboard:
 
                 # Update the stars that the message has in the database and then store the message id's
                 try:
-                    update = """UPDATE starboard_messages SET stars = $1, star_message_id = $2
-                                      WHERE root_message_id = $3 AND guild_id = $4"""
-                    await conn.execute(update, new_stars, star_message.id, message.id, payload.guild_id)
+                    await conn.execute(queries.UPDATE_STARBOARD_MESSAGE, new_stars, star_message.id, message.id, payload.guild_id)
 
                 # Catch errors
                 except asyncpg.PostgresError as e:
@@ -147,7 +237,10 @@ class Starboard:
                     self.bot.update_starboard_message_stars(message.id, payload.guild_id, new_stars)
 
         elif new_stars < min_stars and msg_id:
-            star_message = await channel.fetch_message(msg_id)
+            # Nothing is left to edit once the message is removed from the starboard
+            self.cancel_edit(msg_id, payload.guild_id)
+            star_message = await self.get_star_message(channel, msg_id, payload.guild_id)
+            self.star_messages.remove((msg_id, payload.guild_id))
             await star_message.delete()
 
             # Setup up pool connection
@@ -156,10 +249,7 @@ class Starboard:
 
                 # Update the stars that the message has in the database and set the star message id to None
                 try:
-                    update = """UPDATE starboard_messages 
-                                                  SET stars = $1, star_message_id = NULL
-                                                  WHERE root_message_id = $2 AND guild_id = $3"""
-                    await conn.execute(update, new_stars, message.id, payload.guild_id)
+                    await conn.execute(queries.REMOVE_STARBOARD_MESSAGE, new_stars, message.id, payload.guild_id)
 
                 # Catch errors
                 except asyncpg.PostgresError as e:
@@ -174,63 +264,45 @@ class Starboard:
 
         # When the message already exists on the starboard but doesn't have enough reactions anymore
         elif msg_id:
-            star_message = await channel.fetch_message(msg_id)
-            await star_message.edit(embed=embed)
+            # Merge bursts of reactions into a single edit
+            self.schedule_edit(channel, msg_id, payload.guild_id, embed)
 
-            # Setup up pool connection
-            pool = self.bot.db
-            async with pool.acquire() as conn:
-
-                # Update the stars that the message has in the database and set the star message id to None
-                try:
-                    update = """UPDATE starboard_messages SET stars = $1 WHERE root_message_id = $2 AND guild_id = $3"""
-                    await conn.execute(update, new_stars, message.id, payload.guild_id)
-
-                # Catch errors
-                except asyncpg.PostgresError as e:
-                    print(
-                        f"PostGres Error: Starboard_Message Record Could Not Be Updated For Guild {payload.guild_id}",
-                        e)
-
-                # Update cache
-                else:
-                    self.bot.update_starboard_message_id(message.id, payload.guild_id, star_message.id)
-                    self.bot.update_starboard_message_stars(message.id, payload.guild_id, new_stars)
+            # Update the stars that the message has in the database/cache
+            await self.bot.save_starboard_message_stars(message.id, payload.guild_id, new_stars)
 
         elif not msg_id:
-            self.bot.update_starboard_message_stars(message.id, payload.guild_id, new_stars)
+            await self.bot.save_starboard_message_stars(message.id, payload.guild_id, new_stars)
 
     async def send_starboard_and_update_db(self, payload, action):
         """Send the starboard embed and update database/cache"""
 
         if (starboard := self.bot.get_starboard_channel(payload.guild_id)) and payload.emoji.name == "⭐":
-            message = await self.bot.get_channel(payload.channel_id).fetch_message(payload.message_id)
+            message = await self.get_root_message(payload)
 
-            if not message.author.bot and payload.user_id != message.author.id:
+            if not message.author_bot and payload.user_id != message.author_id:
                 channel = self.bot.get_channel(starboard)
                 msg_id, stars = await self.bot.check_starboard_messages_cache(message.id, payload.guild_id)
                 new_stars = stars + 1 if action == "added" else stars - 1
 
                 embed = Embed(title=f"Starred Message | {new_stars} :star:",
                               description=f"{message.content or 'View Attachment'}",
-                              colour=message.author.colour,
+                              colour=message.author_colour,
                               timestamp=datetime.datetime.utcnow())
-                embed.set_author(name=message.author, icon_url=message.author.avatar_url)
+                embed.set_author(name=message.author, icon_url=message.avatar_url)
                 embed.set_footer(text=f"ID: {message.id}")
                 embed.add_field(name="Original",
-                                value=f"**Channel:** {message.channel.mention}\n[Jump To Message]({message.jump_url})",
+                                value=f"**Channel:** {message.channel_mention}\n[Jump To Message]({message.jump_url})",
                                 inline=False)
 
                 # Send spoiler attachments as links
-                if message.attachments:
-                    file = message.attachments[0]
-                    spoiler = file.is_spoiler()
-                    if not spoiler and file.url.endswith(('png', 'jpeg', 'jpg', 'gif', 'webp')):
-                        embed.set_image(url=file.url)
+                if message.attachment:
+                    filename, url, spoiler = message.attachment
+                    if not spoiler and url.endswith(('png', 'jpeg', 'jpg', 'gif', 'webp')):
+                        embed.set_image(url=url)
                     elif spoiler:
-                        embed.add_field(name='Attachment', value=f'||[{file.filename}]({file.url})||', inline=False)
+                        embed.add_field(name='Attachment', value=f'||[{filename}]({url})||', inline=False)
                     else:
-                        embed.add_field(name='Attachment', value=f'[{file.filename}]({file.url})', inline=False)
+                        embed.add_field(name='Attachment', value=f'[{filename}]({url})', inline=False)
 
                 # When the message has no previous stars, send a new starboard message or update the amount of stars it has
                 if not stars:
@@ -19,6 +19,7 @@ import string
 from datetime import timedelta
 from typing import Optional
 
+import asyncpg
 import discord
 from discord import Member, Embed, DMChannel, NotFound, User
 from discord.ext.commands import command, guild_only, has_guild_permissions, bot_has_guild_permissions, Greedy, \
@@ -106,31 +107,51 @@ async def ummute_members(self, ctx, targets, reason):
 c3
     """
 
+    # Members that the bot is able to unmute
+    unmutable = []
+
     for target in targets:
         if (ctx.guild.me.top_role.position > target.top_role.position
                 and not target.guild_permissions.administrator):
+            unmutable.append(target)
 
-            # Get the roles of the user
-            result = await self.bot.check_cache(target.id, ctx.guild.id)
+        # Send error message if the User could not be muted
+        else:
+            desc = f"**{target.mention} Could Not Be Unmuted!**"
+            await self.bot.generate_embed(ctx, desc=desc)
 
-            # Get muted roles of the user from cache/database and give them back
-            role_ids = result["muted_roles"]
-            roles = [ctx.guild.get_role(int(id_)) for id_ in role_ids.split(", ") if len(id_)]
+    if not unmutable:
+        return
 
-            # Clear all the roles of the user
-            await self.bot.clear_roles(member=target)
+    # Get the roles of all the users from cache/database at once
+    # Without them, the users would be left with no roles at all, so nobody is unmuted
+    try:
+        results = await self.bot.check_cache_many([target.id for target in unmutable], ctx.guild.id)
 
-            await target.edit(roles=roles)
+    # Catch errors
+    except asyncpg.PostgresError:
+        desc = f"**{ctx.bot.cross} Roles Could Not Be Retrieved! Nobody Was Unmuted, Try Again Later {ctx.bot.cross}**"
+        await self.bot.generate_embed(ctx, desc=desc)
+        return
 
-            # Send confirmation to the channel that the user is in
-            await self.bot.generate_embed(ctx, desc=f"{ctx.bot.tick} **{target}** Was Unmuted! {ctx.bot.tick}")
+    # Get muted roles of the users before they are cleared
+    muted_roles = {}
+    for target in unmutable:
+        role_ids = results[target.id].muted_roles if results.get(target.id) else None
+        muted_roles[target.id] = [ctx.guild.get_role(int(id_)) for id_ in role_ids.split(", ") if len(id_)] \
+            if role_ids else []
 
-            await send_to_modlogs(self, ctx, target, reason, action="Unmuted")
+    # Clear all the roles of the users
+    await self.bot.clear_roles_many(unmutable, ctx.guild)
 
-        # Send error message if the User could not be muted
-        else:
-            desc = f"**{target.mention} Could Not Be Unmuted!**"
-            await self.bot.generate_embed(ctx, desc=desc)
+    for target in unmutable:
+        # Give the roles back
+        await target.edit(roles=muted_roles[target.id])
+
+        # Send confirmation to the channel that the user is in
+        await self.bot.generate_embed(ctx, desc=f"{ctx.bot.tick} **{target}** Was Unmuted! {ctx.bot.tick}")
+
+        await send_to_modlogs(self, ctx, target, reason, action="Unmuted")
 
 
 async def mute_members(self, ctx, targets, reason, muted):
@@ -143,44 +164,53 @@ async def mute_members(self, ctx, targets, reason, muted):
 
     """
 
+    # Members that the bot is able to mute
+    mutable = []
+
     for target in targets:
 
         # When user is already muted, send error message
         if muted in target.roles:
             await self.bot.generate_embed(ctx, desc=f"**{ctx.bot.cross} User Is Already Muted! {ctx.bot.cross}**")
 
+        elif (ctx.guild.me.top_role.position > target.top_role.position
+              and not target.guild_permissions.administrator):
+            mutable.append(target)
+
+        # Send error message if the User could not be muted
         else:
+            await self.bot.generate_embed(ctx, desc=f"**{target.mention} Could Not Be Muted!**")
 
-            # Store managed roles into the list of roles to be added to the user (including muted)
-            roles = [role for role in target.roles if role.managed]
-            roles.append(muted)
+    # Store the current roles of all the users within database at once
+    # Without them, the users could never be given their roles back, so nobody is muted
+    if not await self.bot.store_roles_many(mutable, ctx.guild):
+        desc = f"**{ctx.bot.cross} Roles Could Not Be Stored! Nobody Was Muted, Try Again Later {ctx.bot.cross}**"
+        await self.bot.generate_embed(ctx, desc=desc)
+        return
 
-            if (ctx.guild.me.top_role.position > target.top_role.position
-                    and not target.guild_permissions.administrator):
+    for target in mutable:
 
-                # Store the current roles of the user within database
-                await self.bot.store_roles(target=target, ctx=ctx, member=target)
-                # Give the user the muted role (and any integration roles if need be)
-                await target.edit(roles=roles, reason=reason)
+        # Store managed roles into the list of roles to be added to the user (including muted)
+        roles = [role for role in target.roles if role.managed]
+        roles.append(muted)
 
-                # Send confirmation to the channel that the user is in
-                embed = Embed(description=f"{ctx.bot.tick} **{target}** Was Muted! {ctx.bot.tick}",
-                              colour=self.bot.admin_colour)
+        # Give the user the muted role (and any integration roles if need be)
+        await target.edit(roles=roles, reason=reason)
 
-                if self.bot.get_roles_persist(ctx.guild.id) == 0:
-                    embed.add_field(name="**WARNING: ROLE PERSIST NOT ENABLED**",
-                                    value="The bot **will not give** the roles back to the user if they leave the server."
-                                          "\nAllowing the user to bypass the Mute by leaving and rejoining."
-                                          f"\nPlease enable Role Persist by doing **{ctx.prefix}rolepersist enable**",
-                                    inline=True)
+        # Send confirmation to the channel that the user is in
+        embed = Embed(description=f"{ctx.bot.tick} **{target}** Was Muted! {ctx.bot.tick}",
+                      colour=self.bot.admin_colour)
 
-                await ctx.send(embed=embed)
+        if self.bot.get_roles_persist(ctx.guild.id) == 0:
+            embed.add_field(name="**WARNING: ROLE PERSIST NOT ENABLED**",
+                            value="The bot **will not give** the roles back to the user if they leave the server."
+                                  "\nAllowing the user to bypass the Mute by leaving and rejoining."
+                                  f"\nPlease enable Role Persist by doing **{ctx.prefix}rolepersist enable**",
+                            inline=True)
 
-                await send_to_modlogs(self, ctx, target, reason, action="Muted")
+        await ctx.send(embed=embed)
 
-            # Send error message if the User could not be muted
-            else:
-                await self.bot.generate_embed(ctx, desc=f"**{target.mention} Could Not Be Muted!**")
+        await send_to_modlogs(self, ctx, target, reason, action="Muted")
 
 
 async def ban_members(self, ctx, users, reason):
@@ -341,7 +371,6 @@ class Moderation(Cog):
         Unmute Member(s) from Server
         Multiple Members can be unmuted at once
         """
-        unmute = False
 
         if not await check(ctx, members):
             with ctx.typing():
@@ -351,14 +380,18 @@ class Moderation(Cog):
                     await self.bot.generate_embed(ctx, desc=desc)
 
                 else:
+                    # Members that are muted get unmuted together
+                    muted_members = []
                     for member in members:
                         if role in member.roles:
-                            await ummute_members(self, ctx, members, reason)
-                            unmute = True
-                        if role not in member.roles and unmute is False:
+                            muted_members.append(member)
+                        else:
                             desc = f"**{self.bot.cross} {member.mention} Is Not Muted! {self.bot.cross}**"
                             await self.bot.generate_embed(ctx, desc=desc)
 
+                    if muted_members:
+                        await ummute_members(self, ctx, muted_members, reason)
+
     @command(name="ban", usage="`<member>...` `[reason]`")
     @guild_only()
     @has_guild_permissions(ban_members=True)
@@ -18,14 +18,21 @@ import asyncio
 import inspect
 import io
 import textwrap
+import time
 import traceback
 from contextlib import redirect_stdout
+from functools import partial
 from typing import Optional
 
 import asyncpg
-from discord import Member
+from discord import Embed, Member, HTTPException
 from discord.ext.commands import Cog, command, is_owner
 
+from bot.libs.cache import CacheStats
+
+# How often (in seconds) the progress of reloading the members of every guild is edited into its message
+RELOAD_PROGRESS_INTERVAL = 5
+
 
 def cleanup_code(content):
     """Automatically removes code blocks from the code."""
@@ -62,6 +69,8 @@ class Owner(Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        # The background task reloading the members of every guild
+        self.reload_task = None
 
     @command(name="dm", hidden=True)
     @is_owner()
@@ -106,8 +115,10 @@ class Owner(Cog):
     async def restart(self, ctx):
         """Restart the bot"""
 
-        # Close the database connection
+        # Write anything buffered for the database and close the database connection
         try:
+            await self.bot.flush_starboard_stars()
+            await self.bot.member_queue.close()
             await asyncio.wait_for(self.bot.db.close(), timeout=1.0)
 
         # Catch errors
@@ -120,13 +131,11 @@ class Owner(Cog):
                                                     "\nMy Reboot Had No Problems** <a:ThumbsUp:737832825469796382>")
             await self.bot.logout()
 
-    @command(name="reloadusers", hidden=True)
-    @is_owner()
-    async def reload_db(self, ctx):
-        """Reloads the database by inserting/updating all the records"""
+    async def insert_guild_members(self, guild):
+        """Insert every member of the guild, leaving the members that already have records as they are"""
 
         # Store every single record into an array
-        records = [(ctx.guild.id, member.id) for member in ctx.guild.members]
+        records = [(guild.id, member.id) for member in guild.members]
 
         # Setup up pool connection
         pool = self.bot.db
@@ -140,11 +149,133 @@ class Owner(Cog):
 
             # Catch errors
             except asyncpg.PostgresError as e:
-                print(f"PostGres Error: Member(s) were not be able to be added to Guild", e)
+                print(f"PostGres Error: Member(s) were not be able to be added to Guild {guild.id}", e)
+                return False, f"{guild}: **Failed**"
+
+            # Print success
+            # Members of the guild now have records
+            else:
+                print(f"Record(s) Inserted Into Members From {guild}")
+                self.bot.member_negative_cache.remove_many(guild.id)
+                await self.bot.notify_cache(conn, "members", guild.id)
+                return True, f"{guild}: **{len(records)}** Inserted/Checked"
+
+    async def reconcile_guild_members(self, guild, mark_left):
+        """Copy in the members of the guild that have no records (and mark the ones that are gone as left)"""
+
+        # Members that aren't cached yet would be taken as gone and marked as left
+        if mark_left and not guild.chunked:
+            print(f"Members Of Guild {guild.id} Are Not Chunked, Nobody Was Marked As Left")
+            return False, f"{guild}: **Failed** (Members Not Chunked, Try Again Later)"
+
+        # Setup up pool connection
+        pool = self.bot.db
+        async with pool.acquire() as conn:
+
+            # Write only the members that differ from the database
+            try:
+                copied, marked = await self.bot.reconcile_members(conn, guild, mark_left)
+
+            # Catch errors
+            except asyncpg.PostgresError as e:
+                print(f"PostGres Error: Members Could Not Be Reconciled For Guild {guild.id}", e)
+                return False, f"{guild}: **Failed**"
 
             # Print success
+            # Members of the guild now have records
             else:
-                print(f"Record(s) Inserted Into Members")
+                print(f"{copied} Record(s) Copied Into Members And {marked} Marked As Left From {guild}")
+                if copied or marked:
+                    self.bot.member_negative_cache.remove_many(guild.id)
+                    await self.bot.notify_cache(conn, "members", guild.id)
+                return True, f"{guild}: **{copied}** Copied, **{marked}** Marked As Left"
+
+    async def reload_guilds(self, ctx, reload_guild):
+        """
+        Reload the members of every guild one after the other, editing the progress into a message
+
+        reload_guild is given each guild and returns whether it succeeded along with a summary of what was written
+        """
+
+        guilds = list(self.bot.guilds)
+        message = await self.bot.generate_embed(ctx, desc=f"Reloading Members Of **{len(guilds)}** Guilds...")
+
+        start = last_update = time.monotonic()
+        failures = []
+        for done, guild in enumerate(guilds, start=1):
+            # Anything else going wrong (e.g a timed out acquire) only fails this guild, not the whole reload
+            try:
+                success, result = await reload_guild(guild)
+            except Exception as e:
+                print(f"Error: Members Could Not Be Reloaded For Guild {guild.id}", e)
+                success, result = False, f"{guild}: **Failed** ({e.__class__.__name__})"
+
+            if not success:
+                failures.append(result)
+
+            # Edits are rate limited, so progress is only shown every so often
+            if time.monotonic() - last_update >= RELOAD_PROGRESS_INTERVAL and done < len(guilds):
+                last_update = time.monotonic()
+                try:
+                    await message.edit(embed=Embed(description=f"Reloading Members: **{done} / {len(guilds)}** Guilds"
+                                                                f" (**{len(failures)}** Failed)",
+                                                   colour=self.bot.admin_colour))
+
+                # The reload carries on without showing its progress
+                except HTTPException as e:
+                    print("Discord Error: Reload Progress Could Not Be Shown", e)
+
+        desc = f"Reloaded Members Of **{len(guilds)}** Guilds In **{time.monotonic() - start:.1f}s**" \
+               f" (**{len(failures)}** Failed)"
+        if failures:
+            desc += "\n" + "\n".join(failures[:10])
+
+        # The progress message may have been deleted, so the summary is sent again instead
+        try:
+            await message.edit(embed=Embed(description=desc, colour=self.bot.admin_colour))
+        except HTTPException:
+            await self.bot.generate_embed(ctx, desc=desc)
+
+    def reload_done(self, task):
+        """Log anything that stopped the reload of every guild and let another one be started"""
+
+        self.reload_task = None
+        if not task.cancelled() and (e := task.exception()) is not None:
+            print("Error: Reloading The Members Of Every Guild Stopped", repr(e))
+
+    @command(name="reloadusers", hidden=True)
+    @is_owner()
+    async def reload_db(self, ctx, *options):
+        """
+        Reloads the database by inserting/updating all the records
+
+        reconcile: only copy in the members that have no records, found by comparing with the stored ids
+        markleft: along with reconcile, mark the members that are no longer in the guild as left
+        all: reload every guild as a background task, with the progress shown in the message sent
+        """
+
+        options = {option.lower() for option in options}
+        if unknown := options - {"reconcile", "markleft", "all"}:
+            await self.bot.generate_embed(ctx, desc=f"Unknown Option(s): **{', '.join(sorted(unknown))}**"
+                                                    "\nOptions are **reconcile**, **markleft** and **all**")
+            return
+
+        if "reconcile" in options:
+            reload_guild = partial(self.reconcile_guild_members, mark_left="markleft" in options)
+        else:
+            reload_guild = self.insert_guild_members
+
+        if "all" not in options:
+            _, result = await reload_guild(ctx.guild)
+            await self.bot.generate_embed(ctx, desc=result)
+
+        # Only one reload of every guild is run at a time
+        elif self.reload_task and not self.reload_task.done():
+            await self.bot.generate_embed(ctx, desc="**Members Of Every Guild Are Already Being Reloaded!**")
+
+        else:
+            self.reload_task = self.bot.loop.create_task(self.reload_guilds(ctx, reload_guild))
+            self.reload_task.add_done_callback(self.reload_done)
 
     @command(name="cache", hidden=True)
     @is_owner()
@@ -167,9 +298,82 @@ class Owner(Cog):
         # Display the length of the current queue and cache and the max length of the cache
         else:
             max_cache_len, cache_len, queue_len = self.bot.member_cache.get_size()
-            await self.bot.generate_embed(ctx, desc=f"Current Records Stored Within Cache: **{cache_len}**"
+            stats = self.bot.member_cache_stats
+            _, starboard_len, _ = self.bot.starboard_messages_cache.get_size()
+            _, root_len, _ = self.bot.root_message_cache.get_size()
+            root_stats = self.bot.root_message_stats
+            shard_count, shard_ids = self.bot.handled_shards()
+            await self.bot.generate_embed(ctx, desc=f"Shards Handled: **{', '.join(map(str, shard_ids))}**"
+                                                    f" Of **{shard_count}**"
+                                                    f"\nGuilds Stored Within Cache: **{len(self.bot.enso_cache)}**"
+                                                    f"\n\nCurrent Records Stored Within Cache: **{cache_len}**"
                                                     f"\nCurrent Queue Length: **{queue_len}**"
-                                                    f"\nMax Size Of Cache: **{max_cache_len}**")
+                                                    f"\nMax Size Of Cache: **{max_cache_len}**"
+                                                    f"\n\nHits: **{stats.hits}**"
+                                                    f"\nMisses: **{stats.misses}**"
+                                                    f"\nCoalesced Misses: **{stats.coalesced}**"
+                                                    f"\nNegative Hits: **{stats.negative_hits}**"
+                                                    f"\nHit Rate: **{stats.hit_rate():.2f}%**"
+                                                    f"\n\nStarboard Messages Stored Within Cache: **{starboard_len}**"
+                                                    f"\nStarred Messages Stored Within Cache: **{root_len}**"
+                                                    f"\nStarred Message Hits: **{root_stats.hits}**"
+                                                    f"\nStarred Message Fetches: **{root_stats.misses}**"
+                                                    f"\nStarred Message Hit Rate: **{root_stats.hit_rate():.2f}%**"
+                                                    f"\n\nMessages Processed For Commands: **{self.bot.messages_processed}**"
+                                                    f"\nMessages Skipped Without Prefix: **{self.bot.messages_skipped}**"
+                                                    f"{self.cluster_cache_stats()}")
+
+    def cluster_cache_stats(self):
+        """Cache numbers of every cluster added up, when running under the launcher"""
+
+        if not self.bot.cluster or not self.bot.cluster.clusters:
+            return ""
+
+        totals = self.bot.cluster.totals()
+        stats = CacheStats()
+        stats.hits = totals.get("member_hits", 0)
+        stats.misses = totals.get("member_misses", 0)
+        stats.coalesced = totals.get("member_coalesced", 0)
+        stats.negative_hits = totals.get("member_negative_hits", 0)
+
+        return (f"\n\n**Across {len(self.bot.cluster.clusters)} Clusters**"
+                f"\nGuilds Stored Within Cache: **{totals.get('cached_guilds', 0)}**"
+                f"\nRecords Stored Within Cache: **{totals.get('member_cache', 0)}**"
+                f"\nHits: **{stats.hits}**"
+                f"\nMisses: **{stats.misses}**"
+                f"\nCoalesced Misses: **{stats.coalesced}**"
+                f"\nNegative Hits: **{stats.negative_hits}**"
+                f"\nHit Rate: **{stats.hit_rate():.2f}%**"
+                f"\nStarboard Messages Stored Within Cache: **{totals.get('starboard_messages', 0)}**"
+                f"\nStarred Messages Stored Within Cache: **{totals.get('root_messages', 0)}**"
+                f"\nMessages Processed For Commands: **{totals.get('messages_processed', 0)}**"
+                f"\nMessages Skipped Without Prefix: **{totals.get('messages_skipped', 0)}**")
+
+    @command(name="dbstats", hidden=True)
+    @is_owner()
+    async def db_stats(self, ctx):
+        """Show how busy the database pool is and the latencies of the queries"""
+
+        pool = self.bot.db
+        acquire = pool.acquire_stats
+        queue = self.bot.member_queue
+        p50, p95, p99 = (seconds * 1000 for seconds in acquire.percentiles(50, 95, 99))
+
+        desc = f"Connections In Use: **{pool.in_use} / {pool.max_size}**" \
+               f"\nWaiting For A Connection: **{pool.waiting}**" \
+               f"\nAcquired: **{acquire.count}** (**{acquire.failures}** Timed Out)" \
+               f"\nAcquire Wait p50/p95/p99: **{p50:.2f} / {p95:.2f} / {p99:.2f} ms**" \
+               f"\nMember Joins/Leaves: **{queue.events}** In **{queue.flushes}** Batches (**{queue.writes}** Writes)" \
+               "\n\n**Queries By Total Time** (Count | p50/p95/p99 ms)"
+
+        # The queries that take up the most time of the pool are the ones worth looking at
+        queries = sorted(pool.query_stats.items(), key=lambda item: item[1].total, reverse=True)
+        for name, stats in queries[:15]:
+            p50, p95, p99 = (seconds * 1000 for seconds in stats.percentiles(50, 95, 99))
+            failures = f" (**{stats.failures}** Failed)" if stats.failures else ""
+            desc += f"\n`{name}`: {stats.count}{failures} | {p50:.2f} / {p95:.2f} / {p99:.2f}"
+
+        await self.bot.generate_embed(ctx, desc=desc)
 
     @command(name="eval", hidden=True)
     @is_owner()
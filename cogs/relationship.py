@@ -79,8 +79,9 @@ class Relationship(Cog):
             return
 
         # Get the author from the cache
-        db_author = await self.bot.check_cache(ctx.author.id, ctx.guild.id)
-        married_user = db_author["married"]
+        if (db_author := await self.bot.get_member_record(ctx, ctx.author)) is None:
+            return
+        married_user = db_author.married
 
         # Make sure that the person is not already married to someone else within the server
         if married_user:
@@ -89,8 +90,9 @@ class Relationship(Cog):
             return
 
         # Get the member mentioned from the cache
-        db_member = await self.bot.check_cache(member.id, ctx.guild.id)
-        target_user = db_member["married"]
+        if (db_member := await self.bot.get_member_record(ctx, member)) is None:
+            return
+        target_user = db_member.married
 
         if target_user:
             member = guild.get_member(target_user)
@@ -133,11 +135,12 @@ class Relationship(Cog):
 
                     # Update cache new details
                     else:
-                        db_author["married"] = member.id
-                        db_author["married_date"] = message_time
+                        db_author.married = member.id
+                        db_author.married_date = message_time
 
-                        db_member["married"] = ctx.author.id
-                        db_member["married_date"] = message_time
+                        db_member.married = ctx.author.id
+                        db_member.married_date = message_time
+                        await self.bot.notify_cache(conn, "members", guild.id, [ctx.author.id, member.id])
 
                 # Congratulate them!
                 desc = f"**Congratulations! ｡ﾟ( ﾟ^∀^ﾟ)ﾟ｡ {ctx.author.mention} and {member.mention} are now married to each other!**"
@@ -172,8 +175,9 @@ class Relationship(Cog):
             return
 
         # Get the author from the cache
-        db_author = await self.bot.check_cache(ctx.author.id, ctx.guild.id)
-        married_user = db_author["married"]
+        if (db_author := await self.bot.get_member_record(ctx, ctx.author)) is None:
+            return
+        married_user = db_author.married
 
         # Make sure that the person trying to divorce is actually married to the user
         if married_user is None:
@@ -224,12 +228,14 @@ class Relationship(Cog):
 
                     # Update cache with new details
                     else:
-                        db_author["married"] = None
-                        db_author["married_date"] = None
+                        db_author.married = None
+                        db_author.married_date = None
 
-                        db_member = await self.bot.check_cache(member.id, ctx.guild.id)
-                        db_member["married"] = None
-                        db_member["married_date"] = None
+                        # The member is loaded again from the database when they're not cached
+                        if (db_member := self.bot.member_cache.get_cache((member.id, guild.id))) is not None:
+                            db_member.married = None
+                            db_member.married_date = None
+                        await self.bot.notify_cache(conn, "members", guild.id, [ctx.author.id, member.id])
 
                 # Congratulate them!
                 desc = f"**૮( ´⁰▱๋⁰ )ა {ctx.author.mention} and {member.mention} are now divorced." \
@@ -265,10 +271,11 @@ class Relationship(Cog):
         guild = member.guild
 
         # Get the author from the cache
-        result = await self.bot.check_cache(member.id, ctx.guild.id)
+        if (result := await self.bot.get_member_record(ctx, member)) is None:
+            return
 
-        user = result["married"]
-        marriage_date = result["married_date"]
+        user = result.married
+        marriage_date = result.married_date
 
         # Set empty values for non-married users
         if not user:
@@ -0,0 +1,179 @@
+# Ensō~Chan - A Multi Purpose Discord Bot That Has Everything Your Server Needs!
+# Copyright (C) 2020  Hamothy
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Runs Ensō~Chan as several processes (clusters), each running main.py on its own range of shards
+
+    python launcher.py --clusters 4 [--shard-count 16]
+
+Workers that exit are started again, and every worker reports its stats to the launcher
+over a UNIX socket so the owner commands can show numbers for the whole bot.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+
+import aiohttp
+from decouple import config
+
+# Discord only lets a bot identify one shard every 5 seconds, so clusters are started that far apart per shard
+IDENTIFY_DELAY = 5
+# Workers that crash are started again after waiting this long, doubling each time up to RESTART_DELAY_MAX
+RESTART_DELAY = 1
+RESTART_DELAY_MAX = 60
+# A worker which ran for this long (in seconds) is considered to have been healthy, its restart delay goes back to
+# RESTART_DELAY rather than doubling
+HEALTHY_UPTIME = 60
+
+
+async def recommended_shard_count():
+    """Ask Discord how many shards the bot should run"""
+
+    headers = {"Authorization": f"Bot {config('DISCORD_TOKEN')}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get("https://discord.com/api/v7/gateway/bot", headers=headers) as response:
+            response.raise_for_status()
+            return (await response.json())["shards"]
+
+
+class Launcher:
+    def __init__(self, clusters, shard_count, path):
+        self.path = path
+        self.shard_count = shard_count
+
+        # Split the shards into contiguous ranges, one per cluster
+        self.shard_ids = [list(range(shard_count * i // clusters, shard_count * (i + 1) // clusters))
+                          for i in range(clusters)]
+
+        # The latest stats reported by each connected cluster and the process running it
+        self.stats = {}
+        self.processes = {}
+        # The task supervising each cluster
+        self.supervisors = {}
+        self.closing = False
+
+    async def handle_worker(self, reader, writer):
+        """Store the stats sent by a worker and reply with the stats of every cluster"""
+
+        cluster_id = None
+        try:
+            while line := await reader.readline():
+                report = json.loads(line)
+                cluster_id = str(report["cluster_id"])
+                self.stats[cluster_id] = report["stats"]
+
+                writer.write(json.dumps(self.stats).encode() + b"\n")
+                await writer.drain()
+
+        # Workers are expected to go away when they're restarted
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Cluster {cluster_id} Stats Connection Lost", e)
+
+        finally:
+            # Stats of a worker that isn't running shouldn't be counted
+            self.stats.pop(cluster_id, None)
+            writer.close()
+
+    async def supervise(self, cluster_id, shard_ids, delay):
+        """Run the worker of the cluster, starting it again whenever it exits"""
+
+        await asyncio.sleep(delay)
+        restart_delay = RESTART_DELAY
+
+        while not self.closing:
+            started = time.monotonic()
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "main.py",
+                "--shard-count", str(self.shard_count),
+                "--shards", f"{shard_ids[0]}-{shard_ids[-1]}",
+                "--cluster-id", str(cluster_id),
+                "--cluster-socket", self.path)
+            self.processes[cluster_id] = process
+            print(f"Cluster {cluster_id} Started With Shards {shard_ids[0]}-{shard_ids[-1]} (PID {process.pid})")
+
+            returncode = await process.wait()
+            if self.closing:
+                break
+
+            # Back off when the worker keeps crashing straight away
+            if time.monotonic() - started >= HEALTHY_UPTIME:
+                restart_delay = RESTART_DELAY
+            print(f"Cluster {cluster_id} Exited With Code {returncode}, Restarting In {restart_delay}s")
+            await asyncio.sleep(restart_delay)
+            restart_delay = min(restart_delay * 2, RESTART_DELAY_MAX)
+
+    def stop(self):
+        """Stop every worker and don't start them again"""
+
+        self.closing = True
+        for process in self.processes.values():
+            if process.returncode is None:
+                process.terminate()
+
+        # Supervisors still waiting to start (or restart) their worker would otherwise sleep through the shutdown
+        # The ones with a running worker finish by themselves once it has exited
+        for cluster_id, supervisor in self.supervisors.items():
+            process = self.processes.get(cluster_id)
+            if process is None or process.returncode is not None:
+                supervisor.cancel()
+
+    async def run(self):
+        """Start the stats socket and every cluster, until the launcher is stopped"""
+
+        server = await asyncio.start_unix_server(self.handle_worker, path=self.path)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        # Each cluster waits for the shards of the ones before it to have identified
+        delay = 0
+        for cluster_id, shard_ids in enumerate(self.shard_ids):
+            self.supervisors[cluster_id] = loop.create_task(self.supervise(cluster_id, shard_ids, delay))
+            delay += len(shard_ids) * IDENTIFY_DELAY
+
+        # Supervisors cancelled by stop() are done, not failed
+        try:
+            await asyncio.gather(*self.supervisors.values(), return_exceptions=True)
+        finally:
+            server.close()
+            await server.wait_closed()
+            os.unlink(self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clusters", type=int, default=os.cpu_count(), help="Amount of worker processes")
+    parser.add_argument("--shard-count", type=int, help="Amount of shards (asks Discord if not given)")
+    parser.add_argument("--socket", default=os.path.join(tempfile.gettempdir(), f"enso-cluster-{os.getpid()}.sock"),
+                        help="Path of the UNIX socket that the workers report their stats to")
+    args = parser.parse_args()
+
+    shard_count = args.shard_count or asyncio.run(recommended_shard_count())
+    # A cluster without any shards wouldn't have anything to do
+    clusters = min(args.clusters, shard_count)
+
+    print(f"Launching {clusters} Cluster(s) For {shard_count} Shard(s)")
+    asyncio.run(Launcher(clusters, shard_count, args.socket).run())
+
+
+if __name__ == "__main__":
+    main()
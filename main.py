@@ -15,10 +15,41 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <https://www.gnu.org/licenses/>.
 
+import argparse
+
 from bot import Bot
 
+
+def shard_range(value):
+    """Turn shard ranges such as 0-3,6 into a list of shard ids"""
+
+    shard_ids = []
+    try:
+        for part in value.split(","):
+            first, _, last = part.partition("-")
+            shard_ids.extend(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a list of shards such as 0-3,6")
+
+    return shard_ids
+
+
+parser = argparse.ArgumentParser(description="Run Ensō~Chan, optionally on only some of its shards")
+parser.add_argument("--shard-count", type=int, help="Amount of shards across every process (asks Discord if not given)")
+parser.add_argument("--shards", type=shard_range, help="Shards run by this process, e.g 0-3,6 (needs --shard-count)")
+# Given by launcher.py to the processes it runs
+parser.add_argument("--cluster-id", type=int, help=argparse.SUPPRESS)
+parser.add_argument("--cluster-socket", help=argparse.SUPPRESS)
+args = parser.parse_args()
+
+# Every shard has to be known about to tell which ones this process runs
+if args.shards is not None and args.shard_count is None:
+    parser.error("--shards needs --shard-count")
+
 # Initiating Bot Object As Client
-client = Bot()
+# Only the guilds on its shards are loaded into cache
+client = Bot(cluster_id=args.cluster_id, cluster_socket=args.cluster_socket,
+             shard_count=args.shard_count, shard_ids=args.shards)
 
 
 @client.event
@@ -29,7 +60,13 @@ async def on_message(message):
     if message.content.startswith("..") or message.author.bot:
         return
 
+    # Most messages are chat, so don't resolve prefixes/build a context for messages that can't be commands
+    if not client.could_be_command(message):
+        client.messages_skipped += 1
+        return
+
     # Processing the message
+    client.messages_processed += 1
     await client.process_commands(message)
 
 